@@ -0,0 +1,107 @@
+# bench_discounts.py
+# Discount extraction: new engine (lxml, article body only, one combined
+# scan) vs extract_discount_from_html_reference (html.parser, whole page,
+# one regex pass per pattern), on synthetic article pages.
+#
+#   python bench_discounts.py
+
+import random
+import re
+import timeit
+
+from discounts import (
+    article_text,
+    find_offers,
+    extract_discount_from_html_reference,
+)
+
+# Same patterns as the reference, as full matches, tagged with the offer type
+REFERENCE_PATTERNS = {
+    "discount": r"₹\s?[\d,]+\s?(?:off|discount)",
+    "percent_discount": r"[\d]+%\s?discount",
+    "exchange_bonus": r"exchange bonus\s?₹\s?[\d,]+",
+    "cashback": r"cashback\s?₹\s?[\d,]+",
+    "benefits": r"benefits\s?up to\s?₹\s?[\d,]+",
+}
+
+OFFER_SENTENCES = [
+    "The hatchback gets ₹{a} off this month.",
+    "Dealers quote a {p}% discount on older stock.",
+    "There is an exchange bonus ₹{a} on select variants.",
+    "Buyers also get cashback ₹{a} with bank cards.",
+    "Total benefits up to ₹{a} are on offer.",
+    # Overlapping offers: both patterns match and both are counted
+    "Select dealers list benefits up to ₹{a} off the ex-showroom price.",
+    "Trade-ins earn an exchange bonus ₹{a} discount on top.",
+]
+FILLER = "The compact SUV continues with its 1.2-litre petrol engine and a five-speed manual gearbox."
+CHROME = (
+    "<header><nav><a href='/'>Home</a> Flat 90% discount on insurance! ₹999 off accessories</nav></header>"
+    "<script>window.ads = {{cashback: 'cashback ₹100'}};</script>"
+    "<style>.x {{ color: red }}</style>"
+)
+FOOTER = "<aside>Sponsored: benefits up to ₹5,00,000 on loans</aside><footer>© 2026 ₹1 off T&amp;C</footer>"
+
+
+def synthetic_article(paragraphs, seed=0):
+    rng = random.Random(seed)
+    body = []
+
+    for _ in range(paragraphs):
+        sentences = [FILLER] * rng.randint(2, 6)
+        if rng.random() < 0.5:
+            amount = f"{rng.randint(5, 90)},000"
+            sentences.append(rng.choice(OFFER_SENTENCES).format(a=amount, p=rng.randint(2, 15)))
+        rng.shuffle(sentences)
+        body.append("<p>" + " ".join(sentences) + "</p>")
+
+    return (
+        "<html><head><meta charset='utf-8'><title>Offers</title></head><body>"
+        + CHROME
+        + "<article>" + "".join(body) + "</article>"
+        + FOOTER
+        + "</body></html>"
+    )
+
+
+def reference_offers(text):
+    """
+    Offers found by the reference's separate passes, as (type, text).
+    """
+    found = []
+    for offer_type, pattern in REFERENCE_PATTERNS.items():
+        for m in re.finditer(pattern, text, re.IGNORECASE):
+            found.append((offer_type, m.group(0).rstrip(",")))
+    return sorted(found)
+
+
+def new_engine(html_bytes):
+    return find_offers(article_text(html_bytes))
+
+
+def main():
+    print(f"{'paras':>6} {'KB':>6} {'reference (ms)':>15} {'new (ms)':>9} {'speedup':>8} {'match':>6} {'noise dropped':>14}")
+
+    for paragraphs in [5, 20, 100, 500]:
+        page = synthetic_article(paragraphs)
+        page_bytes = page.encode("utf-8")
+
+        # Correctness: on the same body text, one combined scan finds exactly
+        # what the five separate passes find
+        text = article_text(page_bytes)
+        same = reference_offers(text) == sorted((o["type"], o["text"]) for o in find_offers(text))
+
+        # Offers the reference picked up from nav/ads/footer instead of the article
+        whole_page = reference_offers(" ".join(re.sub(r"<[^>]+>", " ", page).split()))
+        noise = len(whole_page) - len(reference_offers(text))
+
+        number = 20 if paragraphs <= 100 else 5
+        ref = min(timeit.repeat(lambda: extract_discount_from_html_reference(page), number=number, repeat=3)) / number
+        new = min(timeit.repeat(lambda: new_engine(page_bytes), number=number, repeat=3)) / number
+
+        print(f"{paragraphs:>6} {len(page_bytes) / 1024:>6.0f} {ref * 1000:>15.2f} {new * 1000:>9.2f} "
+              f"{ref / new:>7.1f}x {str(same):>6} {noise:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# bench_ocr_cleanup.py
+# Micro-benchmark: vectorized clean_ocr_table vs the old row-by-row cleanup,
+# on synthetic OCR tables of 10 to 10,000 rows.
+#
+#   python bench_ocr_cleanup.py
+
+import random
+import timeit
+import numpy as np
+import pandas as pd
+
+from schemes import clean_ocr_table
+
+SIZES = [10, 100, 1000, 10000]
+
+MODELS = ["Ignis", "Baleno", "Ciaz", "XL6", "Fronx", "Grand Vitara", "Jimny"]
+VARIANTS = ["Sigma", "Delta", "Zeta", "Alpha", "Alpha+ AT"]
+NOISE = ["MODEL", "Variant", "", "nan", "None", "Exchange bonus on either scrap",
+         "T&C apply", "Total Max benefits", " Model "]
+
+
+def clean_ocr_table_reference(final_df):
+    """
+    The original cleanup from extract_table_from_image_url, kept as-is
+    for correctness and speed comparison.
+    """
+    final_df = final_df.dropna(how="all")
+    final_df = final_df.loc[:, ~final_df.columns.astype(str).str.contains("^Unnamed")]
+    final_df.columns = [str(c).strip() for c in final_df.columns]
+
+    model_col = final_df.columns[0]
+    variant_col = final_df.columns[1] if len(final_df.columns) > 1 else model_col
+
+    header_keywords = ["MODEL", "VARIANT", "GROUP", "CONSUMER", "EXCHANGE"]
+    final_df = final_df[~final_df[model_col].astype(str).str.upper().isin(header_keywords)]
+
+    final_df[model_col] = final_df[model_col].astype(str).str.strip().replace(["", "nan", "None", "None None"], np.nan)
+    if variant_col != model_col:
+        final_df[variant_col] = final_df[variant_col].astype(str).str.strip().replace(["", "nan", "None"], np.nan)
+
+    for i in range(1, len(final_df)):
+        current_model = final_df.iloc[i][model_col]
+        current_variant = final_df.iloc[i][variant_col]
+
+        if pd.isna(current_model) and pd.notna(current_variant):
+            final_df.iloc[i, final_df.columns.get_loc(model_col)] = final_df.iloc[i-1][model_col]
+
+    garbage_mask = final_df[model_col].astype(str).str.contains(
+        "either scrap|exchange|t&c|conditions apply|applicable|policy|total max",
+        case=False, na=False
+    )
+    final_df = final_df[~garbage_mask]
+
+    final_df = final_df.dropna(subset=final_df.columns[2:], how='all')
+
+    final_df = final_df.reset_index(drop=True)
+    return final_df
+
+
+def synthetic_table(rows, seed=0):
+    """
+    Looks like a concatenated PPStructure table: model names only on the
+    first variant row, repeated header rows, footer text and blank cells.
+    """
+    rng = random.Random(seed)
+    data = []
+
+    for _ in range(rows):
+        r = rng.random()
+        if r < 0.15:
+            model = rng.choice(MODELS)
+        elif r < 0.25:
+            model = rng.choice(NOISE)
+        elif r < 0.30:
+            model = None
+        else:
+            model = np.nan
+
+        variant = rng.choice(VARIANTS) if rng.random() < 0.85 else np.nan
+        cash = rng.choice([np.nan, 10000, 15000, 25000])
+        exchange = rng.choice([np.nan, 20000, 30000])
+
+        data.append([model, variant, cash, exchange, np.nan])
+
+    return pd.DataFrame(data, columns=["Model", "Variant", "Consumer", "Exchange", "Unnamed: 4"])
+
+
+def same_output(a, b):
+    pd.testing.assert_frame_equal(a.astype(object), b.astype(object))
+
+
+def main():
+    print(f"{'rows':>6} {'loop (ms)':>12} {'vectorized (ms)':>16} {'speedup':>8}")
+
+    for rows in SIZES:
+        raw = synthetic_table(rows)
+        same_output(clean_ocr_table_reference(raw.copy()), clean_ocr_table(raw.copy()))
+
+        number = 3 if rows >= 1000 else 20
+        loop = min(timeit.repeat(lambda: clean_ocr_table_reference(raw.copy()), number=number, repeat=3)) / number
+        vec = min(timeit.repeat(lambda: clean_ocr_table(raw.copy()), number=number, repeat=3)) / number
+
+        print(f"{rows:>6} {loop * 1000:>12.2f} {vec * 1000:>16.2f} {loop / vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# bench_workbook.py
+# Final workbook export: streaming workbook.write_workbook (openpyxl
+# write-only) vs the previous per-section to_excel writer, on synthetic
+# results with wide spec tables. Checks both produce the same cells and
+# reports write time and peak Python memory.
+#
+#   python bench_workbook.py
+
+import random
+import time
+import tempfile
+import tracemalloc
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from workbook import write_workbook
+
+BODY_TYPES = ["SUV", "Sedan", "Hatchback", "MUV", "Pickup Truck"]
+
+
+def write_workbook_reference(output_file, market_df, results):
+    """
+    The previous main.write_workbook (openpyxl, to_excel per section),
+    kept as-is for layout and memory comparison.
+    """
+    with pd.ExcelWriter(output_file, engine="openpyxl", mode="w") as writer:
+        all_models = []
+
+        for company in results:
+            start_row = 0
+            pricing_data = results[company]["pricing"]
+            sheet = company[:31]
+            written = False
+
+            # -----------------------------
+            # Market Position + Pricing
+            # -----------------------------
+            mp_df = market_df[market_df["Company"] == company]
+
+            if not mp_df.empty:
+                combined = mp_df.reset_index(drop=True)
+                combined.to_excel(
+                    writer,
+                    sheet_name=sheet,
+                    startrow=start_row,
+                    index=False
+                )
+
+                start_row += len(combined) + 3
+                written = True
+
+            # -----------------------------
+            # Discounts
+            # -----------------------------
+            discounts_df = results[company]["discounts"]
+            if not discounts_df.empty:
+            
+
+                discounts_df.to_excel(
+                    writer,
+                    sheet_name=sheet,
+                    startrow=start_row,
+                    index=False
+                )
+
+                start_row += len(discounts_df) + 3
+                written = True
+
+            # -----------------------------
+            # Schemes
+            # -----------------------------
+            schemes_df = results[company]["schemes"]
+            if not schemes_df.empty:
+        
+                schemes_df.to_excel(
+                    writer,
+                    sheet_name=sheet,
+                    startrow=start_row,
+                    index=False
+                )
+                start_row += len(schemes_df) + 3
+
+            # -----------------------------
+            # Pricing (Structured)
+            # -----------------------------
+            if pricing_data:
+            # Company-level summary
+                summary_df = pd.DataFrame([pricing_data["company_summary"]])
+                summary_df.to_excel(
+                    writer,
+                    sheet_name=sheet,
+                    startrow=start_row,
+                    index=False
+                )
+
+                start_row += len(summary_df) + 2
+
+                # Model-level pricing
+                models_df = pd.DataFrame(pricing_data["models"])
+
+                models_df.to_excel(
+                    writer,
+                    sheet_name=sheet,
+                    startrow=start_row,
+                    index=False
+                )
+
+                start_row += len(models_df) + 4
+
+                for model in pricing_data["models"]:
+                    all_models.append({
+                        "Company": company,
+                        "Segment": model.get("Body Type", "Unknown"),
+                        "Model Name": model.get("Model Name"),
+                        "Price": model.get("Price")
+                    })
+        # -----------------------------
+        # Segment-wise Comparison Sheet
+        # -----------------------------
+        if all_models:
+            df_all = pd.DataFrame(all_models)
+            segments = sorted(df_all["Segment"].dropna().unique())  # sort segments alphabetically
+            start_row = 0
+
+            for segment in segments:
+                title_df = pd.DataFrame(
+                    [[f"Segment: {segment}", "", ""]],
+                    columns=["Company", "Model Name", "Price"]
+                )
+                title_df.to_excel(
+                    writer,
+                    sheet_name="Segment Comparison",
+                    startrow=start_row,
+                    index=False,
+                    header=False
+                )
+                start_row += 1
+
+                # Segment data
+                segment_df = (
+                    df_all[df_all["Segment"] == segment]
+                    [["Company", "Model Name", "Price"]]
+                    .reset_index(drop=True)
+                )
+
+                segment_df.to_excel(
+                    writer,
+                    sheet_name="Segment Comparison",
+                    startrow=start_row,
+                    index=False,
+                    header=True
+                )
+
+                # Leave space after each segment
+                start_row += len(segment_df) + 3
+
+
+def synthetic_results(companies, models, spec_columns, seed=0):
+    rng = random.Random(seed)
+    spec_keys = [f"Spec {i}" for i in range(spec_columns)]
+
+    market_rows = []
+    results = {}
+
+    for c in range(companies):
+        company = f"Company {c}"
+        market_rows.append({"Company": company, "Section": "Market Position", "Overall Rating": rng.uniform(3, 5),
+                            "Number of Service Centers": rng.choice([None, rng.randint(50, 3000)])})
+
+        model_rows = []
+        for m in range(models):
+            row = {"Section": "Pricing", "Model Name": f"Model {c}-{m}", "Price": f"₹ {rng.randint(5, 90)} Lakh",
+                   "Key Features": "ABS, Airbags, Sunroof", "Body Type": rng.choice(BODY_TYPES)}
+            # Every model has its own subset of spec keys, so the table gets wide
+            for key in rng.sample(spec_keys, spec_columns // 2):
+                row[key] = f"{rng.randint(1, 9999)} units"
+            model_rows.append(row)
+
+        discounts = pd.DataFrame([{"Section": "Discounts", "Headline": f"Offer {i}", "Discount Info": "₹20,000 off",
+                                   "Max Benefit (₹)": 20000, "Max Discount (%)": np.nan} for i in range(10)])
+        schemes = pd.DataFrame({"Company": company, "Model": [f"Model {c}-{i}" for i in range(20)],
+                                "Consumer": np.where(np.arange(20) % 3, 15000.0, np.nan)})
+
+        results[company] = {
+            "pricing": {"company_summary": {"Section": "Pricing Summary", "Company": company,
+                                            "Total Models": models, "Types of Cars": "SUV, Sedan"},
+                        "models": model_rows},
+            "discounts": discounts,
+            "schemes": schemes
+        }
+
+    market_df = pd.DataFrame(market_rows)
+    market_df["Market Position"] = range(1, companies + 1)
+    return market_df, results
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def _trim(row):
+    # "" and empty cells look the same in Excel; read-only rows are padded
+    # to the sheet width
+    row = [None if v == "" else v for v in row]
+    while row and row[-1] is None:
+        row.pop()
+    return row
+
+
+def cells(path):
+    book = load_workbook(path, read_only=True)
+    return {
+        ws.title: [_trim(row) for row in ws.iter_rows(values_only=True)]
+        for ws in book.worksheets
+    }
+
+
+def main():
+    print(f"{'companies x models x specs':>27} {'to_excel (s)':>13} {'peak MB':>8} {'stream (s)':>11} {'peak MB':>8} {'same':>5}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for companies, models, specs in [(3, 10, 40), (14, 40, 150), (14, 80, 300)]:
+            market_df, results = synthetic_results(companies, models, specs)
+            old_path = Path(tmp) / "old.xlsx"
+            new_path = Path(tmp) / "new.xlsx"
+
+            old_time, old_peak = measure(write_workbook_reference, old_path, market_df, results)
+            new_time, new_peak = measure(write_workbook, new_path, market_df, results)
+            same = cells(old_path) == cells(new_path)
+
+            label = f"{companies} x {models} x {specs}"
+            print(f"{label:>27} {old_time:>13.2f} {old_peak / 2**20:>8.1f} {new_time:>11.2f} {new_peak / 2**20:>8.1f} {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
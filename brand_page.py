@@ -0,0 +1,270 @@
+# brand_page.py
+# Loads each CarDekho brand page once per run and keeps the rendered HTML.
+# Market position and pricing extractors all read from the same snapshot.
+
+import re
+import asyncio
+from bs4 import BeautifulSoup
+
+import metrics
+from config import (
+    COMPANY_URLS,
+    HTTP_FAST_PATH,
+    SCROLL_MAX_ROUNDS,
+    SCROLL_MAX_SECONDS,
+    SCROLL_ROUND_CEILING_MS,
+)
+from utils import clean, get_soup
+from waits import wait_for_selector, scroll_until_stable
+
+CARDEKHO_BASE = "https://www.cardekho.com"
+
+# Counted while scrolling to see when lazy-loaded model cards stop arriving
+CARD_SELECTOR = "div[class*='listView'] h3"
+
+# Server-rendered selectors the extractors read. If the plain HTTP page has
+# all of them (and every model card), the browser is not needed.
+FAST_PATH_SELECTORS = [
+    "div.gs_readmore p",
+    "div.startRating",
+    "section.KeyHighlights table",
+    "div.carSummary p",
+]
+
+# company -> BrandPage (one snapshot per run)
+_SNAPSHOTS = {}
+
+# company -> asyncio.Lock, so concurrent stages don't load the same page twice
+_LOCKS = {}
+
+
+class BrandPage:
+    def __init__(self, company, url, soup):
+        self.company = company
+        self.url = url
+        self.soup = soup
+
+
+def brand_url(company):
+    slug = COMPANY_URLS.get(company)
+    if not slug:
+        return None
+    return f"{CARDEKHO_BASE}/{slug}"
+
+
+def missing_selector(soup, selectors):
+    """
+    First selector with no match in soup, or None if all are there.
+    """
+    for selector in selectors:
+        if soup.select_one(selector) is None:
+            return selector
+    return None
+
+
+async def _load_with_http(company, url):
+    """
+    Snapshot from the server-rendered HTML, or None if something the
+    extractors need is missing (lazy-loaded cards, blocked request, ...).
+    """
+    try:
+        soup = await get_soup(url, source="cardekho")
+    except Exception as e:
+        print(f"[WARN] HTTP fetch failed for {url}: {e}")
+        metrics.incr("fast_path.brand_page.http_error")
+        return None
+
+    missing = missing_selector(soup, FAST_PATH_SELECTORS)
+    if missing:
+        metrics.incr(f"fast_path.missing.{missing}")
+        return None
+
+    snapshot = BrandPage(company, url, soup)
+
+    # Cards below the fold are lazy-loaded; the summary says how many to expect
+    total_models, _ = extract_summary(snapshot)
+    if not isinstance(total_models, int) or len(extract_model_cards(snapshot)) < total_models:
+        metrics.incr("fast_path.missing.model_cards")
+        return None
+
+    return snapshot
+
+
+async def _load_with_browser(page, company, url):
+    await page.goto(url, timeout=60000)
+
+    # Only for the coverage line; listings can also hold upcoming models
+    expected = None
+    if await wait_for_selector(page, "brand_page.load", "div.carSummary p", ceiling_ms=5000):
+        expected = parse_total_models(await page.locator("div.carSummary p").first.inner_text())
+
+    # Model cards are lazy-loaded, scroll until they stop arriving
+    cards, rounds = await scroll_until_stable(
+        page, "brand_page.scroll", CARD_SELECTOR,
+        max_rounds=SCROLL_MAX_ROUNDS,
+        max_seconds=SCROLL_MAX_SECONDS,
+        round_ceiling_ms=SCROLL_ROUND_CEILING_MS
+    )
+
+    metrics.incr(f"scroll.rounds.{company}", rounds)
+    metrics.incr(f"scroll.cards.{company}", cards)
+    print(f"[INFO] {company}: {cards}/{expected or '?'} model cards after {rounds} scroll rounds")
+
+    return BrandPage(company, url, BeautifulSoup(await page.content(), "lxml"))
+
+
+async def get_brand_page(pool, company):
+    """
+    Return the snapshot of the company's brand page, loading it on first
+    use: plain HTTP first, a page from pool only if that falls short.
+    """
+    url = brand_url(company)
+    if not url:
+        return None
+
+    metrics.incr("brand_page.requests")
+
+    lock = _LOCKS.setdefault(company, asyncio.Lock())
+    async with lock:
+        if company in _SNAPSHOTS:
+            metrics.incr("brand_page.loads_saved")
+            return _SNAPSHOTS[company]
+
+        print(f"[INFO] Loading brand page: {url}")
+        snapshot = None
+
+        if HTTP_FAST_PATH:
+            snapshot = await _load_with_http(company, url)
+
+        if snapshot is not None:
+            metrics.incr("fast_path.brand_page.http")
+        else:
+            snapshot = await pool.run(
+                lambda page, url: _load_with_browser(page, company, url),
+                url
+            )
+            metrics.incr("fast_path.brand_page.browser")
+
+        metrics.incr("brand_page.loads")
+
+        _SNAPSHOTS[company] = snapshot
+        return snapshot
+
+
+# -------------------------------------------------
+# Extractors (run against the snapshot, no page loads)
+# -------------------------------------------------
+
+def extract_price_range(snapshot):
+    para = snapshot.soup.select_one("div.gs_readmore p")
+    if para is None:
+        return None, None, "missing"
+
+    matches = re.findall(
+        r"₹\s*([\d.]+)\s*(Lakh|Cr)",
+        para.get_text(" "),
+        re.IGNORECASE
+    )
+
+    if len(matches) >= 2:
+        min_price = f"{matches[0][0]} {matches[0][1]}"
+        max_price = f"{matches[1][0]} {matches[1][1]}"
+        return min_price, max_price, "ok"
+
+    return None, None, "unmatched"
+
+
+def extract_rating(snapshot):
+    soup = snapshot.soup
+    if soup.select_one("div.startRating") is None:
+        raise ValueError("div.startRating not found")
+
+    rating_text = clean(soup.select_one("span.ratingStarNew").get_text(" "))
+    rating = float(re.findall(r"[\d.]+", rating_text)[0])
+
+    reviews_text = clean(soup.select_one("span.bottomText").get_text(" "))
+    reviews = reviews_text.replace("|", "").strip()
+
+    return rating, reviews
+
+
+def extract_service_centers(snapshot):
+    table = snapshot.soup.select_one("section.KeyHighlights table")
+    if table is None:
+        return None, "missing"
+
+    for row in snapshot.soup.select("section.KeyHighlights table tbody tr"):
+        tds = row.find_all("td")
+        if len(tds) < 2:
+            continue
+
+        key = clean(tds[0].get_text(" ")).lower()
+        value = clean(tds[1].get_text(" "))
+
+        if key == "service centers":
+            match = re.search(r"\d+", value.replace(",", ""))
+            return (int(match.group()) if match else None), "ok"
+
+    return None, "row_missing"
+
+
+def parse_total_models(summary_text):
+    tm = re.search(r"total of (\d+) car models", clean(summary_text))
+    return int(tm.group(1)) if tm else None
+
+
+def extract_summary(snapshot):
+    total_models = "Not found"
+    types_of_cars = "Not found"
+
+    para = snapshot.soup.select_one("div.carSummary p")
+    if para is None:
+        return total_models, types_of_cars
+
+    summary_text = clean(para.get_text(" "))
+
+    total_models = parse_total_models(summary_text) or total_models
+
+    tc = re.search(r"including (.+)", summary_text)
+    if tc:
+        types_of_cars = tc.group(1).strip(".")
+
+    return total_models, types_of_cars
+
+
+def _is_list_view(tag):
+    return tag.name == "div" and "listView" in " ".join(tag.get("class", []))
+
+
+def extract_model_cards(snapshot):
+    """
+    Same cards as the `h3 >> ancestor::div[contains(@class,'listView')]`
+    locator, in document order.
+    """
+    soup = snapshot.soup
+
+    card_ids = set()
+    for h3 in soup.find_all("h3"):
+        for parent in h3.find_parents(_is_list_view):
+            card_ids.add(id(parent))
+
+    cards = []
+    for div in soup.find_all(_is_list_view):
+        if id(div) not in card_ids:
+            continue
+
+        name = clean(div.find("h3").get_text(" "))
+
+        link = div.find("a")
+        model_url = link.get("href") if link else None
+        if model_url and model_url.startswith("/"):
+            model_url = CARDEKHO_BASE + model_url
+
+        price = "Not Available"
+        price_el = div.select_one("div.price")
+        if price_el is not None:
+            price = clean(price_el.get_text(" "))
+
+        cards.append({"name": name, "url": model_url, "price": price})
+
+    return cards
@@ -0,0 +1,54 @@
+# browser_session.py
+# One headless Chromium per run. Stages get their own isolated contexts
+# (separate cookies/cache) instead of launching a browser each.
+# Chromium is launched on the first new_context(), so a run served
+# entirely by the HTTP fast path never starts it.
+
+import asyncio
+from playwright.async_api import async_playwright
+
+import metrics
+
+
+class BrowserSession:
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.playwright = None
+        self.browser = None
+        self.lock = asyncio.Lock()
+
+    async def start(self):
+        return self
+
+    async def _launch(self):
+        async with self.lock:
+            if self.browser is None:
+                self.playwright = await async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(headless=self.headless)
+                metrics.incr("browser.launches")
+            return self.browser
+
+    async def new_context(self, policy=None):
+        """
+        Isolated context for one stage; close it when the stage is done.
+        policy (request_blocking.BlockPolicy) aborts unneeded requests.
+        """
+        browser = await self._launch()
+        context = await browser.new_context()
+        metrics.incr("browser.contexts")
+
+        if policy is not None:
+            await policy.attach(context)
+        return context
+
+    async def close(self):
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
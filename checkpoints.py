@@ -0,0 +1,76 @@
+# checkpoints.py
+# Per-company stage results (market position row, pricing, discounts,
+# scheme post, scheme tables), saved as soon as each one finishes.
+# A crashed run can be resumed with `python main.py --resume`, which
+# reuses every completed unit; the workbook is built from these files.
+
+import os
+import time
+import shutil
+import pickle
+from pathlib import Path
+
+import metrics
+from config import CHECKPOINT_DIR
+
+ROOT = Path(CHECKPOINT_DIR)
+
+# Off unless start() was called, so other entry points (main_sch.py)
+# scrape without touching the store
+_enabled = False
+
+
+def start(resume=False):
+    """
+    Enable checkpointing. A fresh run clears the previous run's units.
+    """
+    global _enabled
+    _enabled = True
+
+    if resume:
+        done = sum(1 for _ in ROOT.glob("*/*.pkl"))
+        print(f"[INFO] Resuming: {done} completed units in {ROOT}")
+    else:
+        shutil.rmtree(ROOT, ignore_errors=True)
+
+
+def _path(stage, company):
+    return ROOT / stage / f"{company}.pkl"
+
+
+def has(stage, company):
+    return _enabled and _path(stage, company).exists()
+
+
+def load(stage, company):
+    with open(_path(stage, company), "rb") as f:
+        return pickle.load(f)
+
+
+def save(stage, company, value):
+    if not _enabled:
+        return
+
+    path = _path(stage, company)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{time.monotonic_ns()}.tmp")
+
+    with open(tmp, "wb") as f:
+        pickle.dump(value, f)
+    os.replace(tmp, path)
+
+    metrics.incr(f"checkpoints.saved.{stage}")
+
+
+async def unit(stage, company, fn):
+    """
+    Result of `await fn()` for this stage/company, reused from the
+    checkpoint when there is one and saved when there isn't.
+    """
+    if has(stage, company):
+        metrics.incr(f"checkpoints.reused.{stage}")
+        return load(stage, company)
+
+    value = await fn()
+    save(stage, company, value)
+    return value
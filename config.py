@@ -11,3 +11,141 @@ URLS = {
     "market_position": "https://www.marklines.com/en/statistics/flash_sales/automotive-sales-in-india-by-month",
     "schemes": "https://www.autopunditz.com/offers-for-the-month"
 }
+
+# CarDekho brand listing slugs (https://www.cardekho.com/{slug})
+COMPANY_URLS = {
+    "Maruti Suzuki": "maruti-suzuki-cars",
+    "Hyundai": "cars/Hyundai",
+    "Mahindra": "cars/Mahindra",
+    "Kia": "cars/Kia",
+    "MG Motor": "cars/MG",
+    "Toyota": "toyota-cars",
+    "Honda": "cars/Honda",
+    "Renault": "cars/Renault",
+    "Nissan": "cars/Nissan",
+    "Skoda": "cars/Skoda",
+    "Volkswagen": "cars/Volkswagen",
+    "BYD": "cars/BYD",
+    "Volvo": "cars/Volvo",
+    "Tata Motors": "cars/Tata"
+}
+
+# Keywords that identify a company in post titles and news headlines
+COMPANY_NAME_MAP = {
+    "Maruti Suzuki": ["maruti", "nexa"],
+    "Hyundai": ["hyundai"],
+    "Mahindra": ["mahindra"],
+    "Kia": ["kia"],
+    "MG Motor": ["mg"],
+    "Toyota": ["toyota"],
+    "Honda": ["honda"],
+    "Renault": ["renault"],
+    "Nissan": ["nissan"],
+    "Skoda": ["skoda"],
+    "Volkswagen": ["volkswagen", "vw"],
+    "BYD": ["byd"],
+    "Volvo": ["volvo"],
+    "Tata Motors": ["tata"]
+}
+
+# Read CarDekho brand/spec pages with HTTP + lxml when the server-rendered
+# HTML has everything; Playwright is only used as the fallback
+HTTP_FAST_PATH = True
+
+# Trace Python allocations during the workbook export and report the peak.
+# Off by default: tracemalloc makes the export several times slower.
+WORKBOOK_TRACE_MEMORY = False
+
+# Date-partitioned Parquet history of every run (history.py)
+HISTORY_DIR = "output/history"
+
+# Per-company stage results of the current main.py run (checkpoints.py)
+CHECKPOINT_DIR = "checkpoints"
+
+# Model listings and their specs from earlier runs (entity_store.py).
+# Specs are re-fetched when the card's name/price changes or they get this old.
+ENTITY_STORE_PATH = "cache/models.sqlite"
+MODEL_SPECS_MAX_AGE_DAYS = 14
+
+# Spec URL pattern that worked per brand / URL shape (spec_strategy.py)
+SPEC_STRATEGY_FILE = "cache/spec_url_strategies.json"
+
+# Brand page lazy-load scrolling (browser fallback): stop when a round adds
+# no model cards, or at the round / time cap
+SCROLL_MAX_ROUNDS = 20
+SCROLL_MAX_SECONDS = 30
+SCROLL_ROUND_CEILING_MS = 1500
+
+# Spec page pool (PricingScraper.get_specs_and_features)
+SPEC_POOL_SIZE = 4
+
+# Companies scraped at the same time by main.py
+COMPANY_CONCURRENCY = 4
+
+# Max concurrent requests per host (browser page loads and HTTP fetches)
+HOST_CONCURRENCY = {
+    "www.cardekho.com": 4,
+    "www.autopunditz.com": 2,
+    "static.wixstatic.com": 4,
+    "news.google.com": 2
+}
+DEFAULT_HOST_CONCURRENCY = 2
+
+# On-disk cache of OCR'd scheme tables (keyed by image bytes + engine config)
+OCR_CACHE_DIR = "cache/ocr"
+OCR_CACHE_MAX_MB = 200
+OCR_CACHE_MAX_AGE_DAYS = 45
+
+# On-disk HTTP cache (utils.fetch): TTL in seconds per source, size cap for all
+HTTP_CACHE_DIR = "cache/http"
+HTTP_CACHE_MAX_MB = 500
+HTTP_CACHE_TTLS = {
+    "feed": 30 * 60,             # Google News RSS searches
+    "blog": 6 * 3600,            # autopunditz offers listing
+    "article": 7 * 86400,        # discount articles
+    "image": 30 * 86400,         # wixstatic scheme images
+    "cardekho": 6 * 3600         # brand and spec pages (HTTP fast path)
+}
+DEFAULT_HTTP_CACHE_TTL = 24 * 3600
+
+# Ad, analytics and tracker hosts (subdomains included) never needed by a scraper
+BLOCKED_DOMAINS = [
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com",
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "adservice.google.com", "amazon-adsystem.com", "facebook.net",
+    "facebook.com", "hotjar.com", "clarity.ms", "scorecardresearch.com",
+    "taboola.com", "outbrain.com", "criteo.com", "moengage.com",
+    "izooto.com", "chartbeat.com", "nr-data.net", "sentry.io"
+]
+
+# Browser request blocking per scraper (request_blocking.py). Images are
+# blocked on the scheme posts too: only the wow-image src attributes are
+# read, and the images themselves are downloaded over HTTP.
+# Stylesheets stay on; lazy-loaded cards depend on layout.
+REQUEST_BLOCKING = {
+    "market_position": {"resource_types": ["image", "media", "font"], "domains": BLOCKED_DOMAINS},
+    "pricing": {"resource_types": ["image", "media", "font"], "domains": BLOCKED_DOMAINS},
+    "schemes": {"resource_types": ["image", "media", "font"], "domains": BLOCKED_DOMAINS}
+}
+
+# Let blocked requests through and count their bytes as blocking.bytes_avoided
+REQUEST_BLOCKING_AUDIT = False
+
+# Scheme OCR process pool: each worker holds its own PPStructure engine
+OCR_WORKERS = 8
+OCR_THREADS_PER_WORKER = 2
+
+# Per-host politeness for discount feeds and articles: (requests per second, burst).
+# Applied to every redirect hop, so a feed link's news.google.com redirect and
+# the article host it lands on each use their own bucket.
+HOST_RATE_LIMITS = {
+    "news.google.com": (5, 5)
+}
+DEFAULT_HOST_RATE_LIMIT = (1, 2)
+
+# Discount articles fetched at the same time
+DISCOUNT_FETCH_CONCURRENCY = 8
+
+# Discount news: companies per combined Google News query, and feed timeout (s)
+DISCOUNT_QUERY_BATCH = 5
+DISCOUNT_FEED_TIMEOUT = 10
@@ -4,94 +4,341 @@
  
 import feedparser
 import pandas as pd
-import time
+import asyncio
 from datetime import datetime, timedelta
-from urllib.parse import quote_plus
-import requests
+from urllib.parse import quote_plus, urlsplit, urlunsplit
 from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 import re
+from utils import fetch
+from config import (
+    COMPANY_NAME_MAP,
+    DISCOUNT_FETCH_CONCURRENCY,
+    DISCOUNT_QUERY_BATCH,
+    DISCOUNT_FEED_TIMEOUT
+)
+import metrics
  
-def extract_discount_from_article(url):
+# Look for patterns like ₹50,000 off, 10% discount, exchange bonus ₹30,000.
+# One combined pattern, one scan; the outer group name is the offer type.
+# "₹50,000 off" is separate: it can sit inside "benefits up to ₹50,000 off"
+# or "exchange bonus ₹30,000 discount", and both offers count.
+DISCOUNT_PATTERN = re.compile(r"₹\s?(?P<amount>[\d,]+)\s?(?:off|discount)", re.IGNORECASE)
+OFFER_PATTERN = re.compile(
+    r"(?P<percent_discount>(?P<percent>\d+)%\s?discount)"
+    r"|(?P<exchange_bonus>exchange bonus\s?₹\s?(?P<exchange_bonus_amt>[\d,]+))"
+    r"|(?P<cashback>cashback\s?₹\s?(?P<cashback_amt>[\d,]+))"
+    r"|(?P<benefits>benefits\s?up to\s?₹\s?(?P<benefits_amt>[\d,]+))",
+    re.IGNORECASE
+)
+ 
+# Every offer contains ₹ or %, so the scan only looks near those characters.
+# An offer starts at most OFFER_PREFIX chars before its anchor
+# ("benefits up to ₹") and ends within OFFER_SUFFIX chars after it.
+OFFER_ANCHOR = re.compile("[₹%]")
+OFFER_PREFIX = 24
+OFFER_SUFFIX = 40
+ 
+# Page chrome that never holds the article text
+NON_ARTICLE_XPATH = "//script|//style|//noscript|//nav|//header|//footer|//aside|//form"
+ 
+# Most specific first
+ARTICLE_BODY_XPATHS = ["//article", "//*[@itemprop='articleBody']", "//main"]
+ 
+ 
+def article_text(content, encoding=None):
+    """
+    Text of the main article body, parsed with lxml.
+    """
+    parser = lxml_html.HTMLParser(encoding=encoding) if encoding else None
+    doc = lxml_html.fromstring(content, parser=parser)
+ 
+    for el in doc.xpath(NON_ARTICLE_XPATH):
+        el.drop_tree()
+ 
+    body = None
+    for xpath in ARTICLE_BODY_XPATHS:
+        found = doc.xpath(xpath)
+        if found:
+            body = found[0]
+            break
+ 
+    if body is None:
+        body = doc.find("body")
+    if body is None:
+        body = doc
+ 
+    return " ".join(" ".join(body.itertext()).split())
+ 
+ 
+def _to_int(amount):
     try:
-        resp = requests.get(url, timeout=5)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        text = soup.get_text(separator=" ", strip=True)
-       
-        # Look for patterns like ₹50,000 off, 10% discount, exchange bonus ₹30,000
-        patterns = [
-            r"₹\s?[\d,]+\s?(off|discount)",
-            r"[\d]+%\s?discount",
-            r"exchange bonus\s?₹\s?[\d,]+",
-            r"cashback\s?₹\s?[\d,]+",
-            r"benefits\s?up to\s?₹\s?[\d,]+"
-        ]
-        matches = []
-        for p in patterns:
-            matches += re.findall(p, text, re.IGNORECASE)
-       
-        return ", ".join(matches) if matches else "Discount details not specified"
-   
+        return int(amount.replace(",", ""))
+    except ValueError:
+        return None
+ 
+ 
+def find_offers(text):
+    """
+    [{"type", "amount", "percent", "text"}] for every offer in text.
+    """
+    offers = []
+    pos = 0
+ 
+    for anchor in OFFER_ANCHOR.finditer(text):
+        i = anchor.start()
+ 
+        # i < pos: inside the previous offer
+        if i >= pos:
+            m = OFFER_PATTERN.search(text, max(pos, i - OFFER_PREFIX), i + OFFER_SUFFIX)
+ 
+            # A match starting after the anchor belongs to a later anchor
+            if m is not None and m.start() <= i:
+                pos = m.end()
+ 
+                offer_type = m.lastgroup
+                if offer_type == "percent_discount":
+                    amount, percent = None, int(m.group("percent"))
+                else:
+                    amount, percent = _to_int(m.group(f"{offer_type}_amt")), None
+ 
+                offers.append(_offer(offer_type, amount, percent, m))
+ 
+        # Also at a ₹ already inside an offer
+        m = DISCOUNT_PATTERN.match(text, i)
+        if m is not None:
+            offers.append(_offer("discount", _to_int(m.group("amount")), None, m))
+ 
+    return offers
+ 
+
+def _offer(offer_type, amount, percent, m):
+    return {
+        "type": offer_type,
+        "amount": amount,
+        "percent": percent,
+        "text": m.group(0).rstrip(",")
+    }
+ 
+ 
+def summarize_offers(offers):
+    """
+    Row fields for the Discounts section.
+    """
+    if offers is None:
+        info = "Error fetching details"
+        offers = []
+    elif not offers:
+        info = "Discount details not specified"
+    else:
+        info = ", ".join(o["text"] for o in offers)
+ 
+    amounts = [o["amount"] for o in offers if o["amount"] is not None]
+    percents = [o["percent"] for o in offers if o["percent"] is not None]
+ 
+    return {
+        "Discount Info": info,
+        "Offer Types": ", ".join(dict.fromkeys(o["type"] for o in offers)),
+        "Max Benefit (₹)": max(amounts) if amounts else None,
+        "Max Discount (%)": max(percents) if percents else None
+    }
+ 
+ 
+async def extract_discount_from_article(url):
+    """
+    (resolved URL, offers) for the article. offers is None if it can't be fetched.
+    """
+    try:
+        resp = await fetch(url, timeout=5, source="article", rate_limited=True)
+        # lxml reads bytes with no declared charset as latin-1 and garbles ₹
+        return str(resp.url), find_offers(article_text(resp.content, resp.encoding))
     except Exception:
-        return "Error fetching details"
+        return url, None
  
  
-def scrape_discounts(company):
+def extract_discount_from_html_reference(html):
     """
-    Fetch company-specific car discount / offer news
-    from the last 2 months using Google News RSS.
+    Previous implementation (whole page, html.parser, one regex pass per
+    pattern), kept for bench_discounts.py.
     """
+    soup = BeautifulSoup(html, "html.parser")
+    text = soup.get_text(separator=" ", strip=True)
+ 
+    patterns = [
+        r"₹\s?[\d,]+\s?(off|discount)",
+        r"[\d]+%\s?discount",
+        r"exchange bonus\s?₹\s?[\d,]+",
+        r"cashback\s?₹\s?[\d,]+",
+        r"benefits\s?up to\s?₹\s?[\d,]+"
+    ]
+    matches = []
+    for p in patterns:
+        matches += re.findall(p, text, re.IGNORECASE)
+ 
+    return ", ".join(matches) if matches else "Discount details not specified"
+ 
+ 
+# ------------------ NEWS FEEDS ------------------
+ 
+# Whole words only: "mg" must not match "img" or "kia" match "Nokia"
+COMPANY_KEYWORD_RE = {
+    company: re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + r")\b", re.IGNORECASE)
+    for company, keywords in COMPANY_NAME_MAP.items()
+}
  
-    # Better, more specific query
-    query = f"{company} car discount OR offer OR benefits India"
-    encoded_query = quote_plus(query)
  
-    feed_url = (
+def batch_feed_url(companies):
+    """
+    One Google News RSS search covering several companies.
+    """
+    names = " OR ".join(f'"{company}"' for company in companies)
+    query = f"({names}) car discount OR offer OR benefits India"
+ 
+    return (
         "https://news.google.com/rss/search?"
-        f"q={encoded_query}&hl=en-IN&gl=IN&ceid=IN:en"
+        f"q={quote_plus(query)}&hl=en-IN&gl=IN&ceid=IN:en"
     )
  
-    rows = []
+ 
+def companies_in(title, companies):
+    return [
+        company for company in companies
+        if company in COMPANY_KEYWORD_RE and COMPANY_KEYWORD_RE[company].search(title)
+    ]
+ 
+ 
+def canonical_link(url):
+    """
+    Link without query string or fragment (tracking params like ?oc=5).
+    """
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+ 
+ 
+async def fetch_feed_entries(companies):
+    """
+    (entries, failed): recent entries (last 2 months) from the batched
+    feeds, once per link, and the companies whose feed could not be fetched.
+    """
+    batches = [
+        companies[i:i + DISCOUNT_QUERY_BATCH]
+        for i in range(0, len(companies), DISCOUNT_QUERY_BATCH)
+    ]
+ 
+    async def fetch_feed(batch):
+        url = batch_feed_url(batch)
+        try:
+            resp = await fetch(url, timeout=DISCOUNT_FEED_TIMEOUT, source="feed", rate_limited=True)
+            resp.raise_for_status()
+            metrics.incr("discounts.feeds")
+            return feedparser.parse(resp.content).entries
+        except Exception as e:
+            print(f"[WARN] Discount feed failed for {', '.join(batch)}: {e}")
+            return None
+ 
+    feeds = await asyncio.gather(*(fetch_feed(batch) for batch in batches))
+ 
+    # A failed feed is not "no news": its companies get no result at all
+    failed = [c for batch, feed in zip(batches, feeds) if feed is None for c in batch]
  
     # Cutoff date → last 2 months
     cutoff_date = datetime.now() - timedelta(days=60)
  
-    try:
-        feed = feedparser.parse(feed_url)
-    except Exception:
-        return pd.DataFrame()
+    entries = {}
+    for feed_entries in feeds:
+        for entry in feed_entries or []:
+            # Parse published date safely
+            try:
+                published_dt = datetime(*entry.published_parsed[:6])
+            except Exception:
+                continue
  
-    for entry in feed.entries:
-        published_dt = None
+            # Keep only last 2 months data
+            if published_dt < cutoff_date:
+                continue
  
-        # Parse published date safely
-        try:
-            published_dt = datetime(*entry.published_parsed[:6])
-        except Exception:
-            continue
- 
-        # Keep only last 2 months data
-        if published_dt >= cutoff_date:
-            discount_details = extract_discount_from_article(entry.link)
-            rows.append({
+            entries.setdefault(canonical_link(entry.link), (entry, published_dt))
+ 
+    return list(entries.values()), failed
+ 
+ 
+# ------------------ DISCOUNTS ------------------
+ 
+def no_discount_rows():
+    return [{
+        "Section": "Discounts",
+        "Discount Info": "No discount news found in last 2 months",
+        "Published Date": "",
+        "Source": "Google News",
+        "Link": ""
+    }]
+ 
+ 
+async def scrape_all_discounts(companies):
+    """
+    Car discount / offer news from the last 2 months for all companies,
+    from a few combined Google News queries. Each headline is assigned to
+    every company it mentions, and each article is downloaded once.
+ 
+    Returns {company: DataFrame}. Companies whose feed could not be fetched
+    are left out, so the caller can tell a failure from no news.
+    """
+    entries, failed = await fetch_feed_entries(companies)
+    companies = [c for c in companies if c not in failed]
+
+    recent = []
+    for entry, published_dt in entries:
+        matched = companies_in(entry.title, companies)
+        if matched:
+            recent.append((entry, published_dt, matched))
+ 
+    # Articles are fetched concurrently on the shared client; politeness
+    # is per host (token bucket) instead of a fixed sleep between articles.
+    # Limits apply to each redirect hop's host, so the real article hosts
+    # are limited, not just news.google.com. Cached articles take no token.
+    limit = asyncio.Semaphore(DISCOUNT_FETCH_CONCURRENCY)
+ 
+    async def fetch_details(url):
+        async with limit:
+            return await extract_discount_from_article(url)
+ 
+    details = await asyncio.gather(*(fetch_details(entry.link) for entry, _, _ in recent))
+ 
+    metrics.incr("discounts.articles_fetched", len(recent))
+    metrics.incr("discounts.article_fetches_saved", sum(len(m) for _, _, m in recent) - len(recent))
+ 
+    rows = {company: [] for company in companies}
+    seen = {company: set() for company in companies}
+ 
+    for (entry, published_dt, matched), (resolved_url, offers) in zip(recent, details):
+        for company in matched:
+            # Different feed links can redirect to the same article
+            if resolved_url in seen[company]:
+                continue
+            seen[company].add(resolved_url)
+ 
+            rows[company].append({
                 "Section": "Discounts",
                 "Headline": entry.title,
-                "Discount Info": discount_details,
+                **summarize_offers(offers),
                 "Published Date": published_dt.strftime("%d-%b-%Y"),
                 "Source": "Google News",
-                "Link": entry.link
+                "Link": resolved_url
             })
-            time.sleep(1)
  
     # If no recent discounts found
-    if not rows:
-        rows.append({
-            "Section": "Discounts",
-            "Discount Info": "No discount news found in last 2 months",
-            "Published Date": "",
-            "Source": "Google News",
-            "Link": ""
-        })
- 
-    return pd.DataFrame(rows)
- 
- 
\ No newline at end of file
+    return {
+        company: pd.DataFrame(rows[company] or no_discount_rows())
+        for company in companies
+    }
+ 
+ 
+async def scrape_discounts(company):
+    """
+    Discounts for a single company (see scrape_all_discounts).
+    """
+    results = await scrape_all_discounts([company])
+    if company not in results:
+        raise RuntimeError(f"Discount news feed failed for {company}")
+    return results[company]
+ 
@@ -0,0 +1,120 @@
+# entity_store.py
+# SQLite store of model listings keyed by model URL, with a fingerprint of
+# the listing card (name + price). Spec pages are only re-fetched for new
+# models, changed cards, or specs older than MODEL_SPECS_MAX_AGE_DAYS.
+# Changes against the previous run are collected for report_changes().
+
+import time
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+
+import metrics
+from config import ENTITY_STORE_PATH, MODEL_SPECS_MAX_AGE_DAYS
+
+_conn = None
+
+# (company, kind, model name, detail) for this run
+_changes = []
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        Path(ENTITY_STORE_PATH).parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(ENTITY_STORE_PATH)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS models (
+                url TEXT PRIMARY KEY,
+                company TEXT,
+                name TEXT,
+                price TEXT,
+                fingerprint TEXT,
+                specs TEXT,
+                features TEXT,
+                fetched_at REAL,
+                last_seen REAL
+            )
+        """)
+    return _conn
+
+
+def fingerprint(card):
+    return hashlib.sha1(f"{card['name']}|{card['price']}".encode()).hexdigest()
+
+
+def lookup(company, card):
+    """
+    (specs, features) stored for the card if they can be reused,
+    otherwise None. Records why the card needs a fetch.
+    """
+    row = _db().execute(
+        "SELECT name, price, fingerprint, specs, features, fetched_at FROM models WHERE url = ?",
+        (card["url"],)
+    ).fetchone()
+
+    if row is None:
+        _changes.append((company, "new", card["name"], card["price"]))
+        return None
+
+    name, price, fp, specs, features, fetched_at = row
+
+    if fp != fingerprint(card):
+        if name == card["name"]:
+            detail = f"{price} → {card['price']}"
+        else:
+            detail = f"({name}) {price} → {card['price']}"
+        _changes.append((company, "changed", card["name"], detail))
+        return None
+
+    if time.time() - fetched_at > MODEL_SPECS_MAX_AGE_DAYS * 86400:
+        _changes.append((company, "stale", card["name"], ""))
+        return None
+
+    _db().execute("UPDATE models SET last_seen = ? WHERE url = ?", (time.time(), card["url"]))
+    metrics.incr("entity_store.specs_reused")
+    return json.loads(specs), features
+
+
+def store(company, card, specs, features):
+    now = time.time()
+    _db().execute(
+        "INSERT OR REPLACE INTO models VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (card["url"], company, card["name"], card["price"], fingerprint(card),
+         json.dumps(specs), features, now, now)
+    )
+    metrics.incr("entity_store.specs_fetched")
+
+
+def finish_company(company, urls):
+    """
+    Models no longer listed for the company are dropped and reported.
+    """
+    db = _db()
+    gone = [
+        (url, name) for url, name in db.execute("SELECT url, name FROM models WHERE company = ?", (company,))
+        if url not in urls
+    ]
+    for url, name in gone:
+        db.execute("DELETE FROM models WHERE url = ?", (url,))
+        _changes.append((company, "removed", name, ""))
+
+    db.commit()
+
+
+def report_changes():
+    print("\n========== MODEL CHANGES ==========")
+
+    if not _changes:
+        print("No new, changed, stale or removed models")
+        return
+
+    for company in sorted({c for c, _, _, _ in _changes}):
+        rows = [ch for ch in _changes if ch[0] == company]
+        counts = {kind: sum(1 for ch in rows if ch[1] == kind) for kind in ["new", "changed", "stale", "removed"]}
+        print(f"{company}: " + ", ".join(f"{n} {kind}" for kind, n in counts.items() if n))
+
+        for _, kind, name, detail in rows:
+            if kind != "stale":
+                print(f"   [{kind}] {name} {detail}".rstrip())
@@ -0,0 +1,263 @@
+# history.py
+# Every run's market position, pricing, discount and scheme rows, kept as
+# a Parquet dataset partitioned by run date:
+#
+#   output/history/<table>/run_date=YYYY-MM-DD/<run_id>.parquet
+#
+# load() reads only the partitions in the date range and the columns asked
+# for, so trend questions don't need to open old workbooks.
+#
+#   python history.py market_position "Market Position" --company Kia --days 90
+#   python history.py market_position "Max Price Value (Lakh)" --days 180
+#   python history.py pricing "Price (Lakh)" --company Hyundai --days 90
+
+import re
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from config import HISTORY_DIR
+from market_position import price_text_to_lakh, reviews_text_to_count
+
+ROOT = Path(HISTORY_DIR)
+
+TABLES = ["market_position", "pricing", "discounts", "schemes"]
+
+# Stored as float64; every other column is stored as a string, so runs with
+# different spec / OCR columns still share one schema per column
+NUMERIC_COLUMNS = {
+    "market_position": [
+        "Min Price Value (Lakh)", "Max Price Value (Lakh)", "Average Price (Lakh)",
+        "Price Score", "Overall Rating", "Overall Reviews Number", "Review Score",
+        "Number of Service Centers", "Service Score", "Market Position"
+    ],
+    "pricing": ["Price (Lakh)"],
+    "discounts": ["Max Benefit (₹)", "Max Discount (%)"],
+    "schemes": []
+}
+
+# Always returned by load()
+KEY_COLUMNS = ["run_date", "run_id", "Company"]
+
+
+def unique_columns(df):
+    """
+    df with string column names, repeated ones suffixed with "_"
+    (OCR tables can repeat a header).
+    """
+    columns = []
+    for c in df.columns:
+        name = str(c)
+        while name in columns:
+            name += "_"
+        columns.append(name)
+    return df.set_axis(columns, axis=1)
+
+
+def _parsed(parse, text):
+    try:
+        return parse(text)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+# market_position value columns parsed from the scraped text: the min/max
+# price ("6.5 Lakh", "1.2 Cr") in lakh, the review count ("9.2K reviews" is 9200)
+MARKET_POSITION_VALUES = {
+    "Min Price Value (Lakh)": ("Min Price (Lakh)", price_text_to_lakh),
+    "Max Price Value (Lakh)": ("Max Price (Lakh)", price_text_to_lakh),
+    "Overall Reviews Number": ("Overall Reviews Count", reviews_text_to_count)
+}
+
+
+def market_position_values(market_df):
+    """
+    market_df with the MARKET_POSITION_VALUES columns filled in where they
+    are missing. The text columns are kept as they are.
+    """
+    if market_df is None or market_df.empty:
+        return market_df
+
+    market_df = market_df.copy()
+    for value_column, (text_column, parse) in MARKET_POSITION_VALUES.items():
+        if text_column not in market_df.columns:
+            continue
+        parsed = market_df[text_column].map(lambda text: _parsed(parse, text)).astype("float64")
+        if value_column in market_df.columns:
+            parsed = market_df[value_column].fillna(parsed)
+        market_df[value_column] = parsed
+    return market_df
+
+
+def price_to_lakh(price_text):
+    """
+    Lower end of a listing price like "₹11.11 - 20.50 Lakh*" in lakh.
+    """
+    if not isinstance(price_text, str):
+        return None
+
+    m = re.search(r"([\d.]+)", price_text.replace(",", ""))
+    if not m:
+        return None
+
+    try:
+        value = float(m.group(1))
+    except ValueError:
+        return None
+
+    # "₹95 Lakh - 1.2 Cr": the unit right after the first number wins
+    unit = re.search(r"(lakh|cr)", price_text[m.end():], re.IGNORECASE)
+    if unit and unit.group(1).lower() == "cr":
+        return value * 100
+    return value
+
+
+# ------------------ WRITE ------------------
+
+def append_table(table, run_id, df):
+    if df is None or df.empty:
+        return
+
+    df = unique_columns(df).copy()
+    df.insert(0, "run_id", run_id)
+
+    for column in df.columns:
+        if column in NUMERIC_COLUMNS[table]:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+        else:
+            df[column] = df[column].astype("string")
+
+    run_date = run_id[:10]
+    path = ROOT / table / f"run_date={run_date}" / f"{run_id}.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        df.to_parquet(path, index=False)
+    except Exception as e:
+        print(f"[WARN] History not written for {table}: {e}")
+
+
+def append_run(run_id, market_df, results):
+    """
+    Add one main.py run to the history. run_id is the output timestamp
+    (YYYY-MM-DD_HH-MM-SS).
+    """
+    append_table("market_position", run_id, market_position_values(market_df))
+
+    pricing, discounts, schemes = [], [], []
+    for company, result in results.items():
+        if result["pricing"] and result["pricing"]["models"]:
+            models_df = pd.DataFrame(result["pricing"]["models"])
+            models_df.insert(0, "Company", company)
+            models_df["Price (Lakh)"] = models_df["Price"].map(price_to_lakh)
+            pricing.append(models_df)
+
+        if not result["discounts"].empty:
+            discounts.append(result["discounts"].assign(Company=company))
+
+        if not result["schemes"].empty:
+            schemes.append(unique_columns(result["schemes"]))
+
+    for table, frames in [("pricing", pricing), ("discounts", discounts), ("schemes", schemes)]:
+        if frames:
+            append_table(table, run_id, pd.concat(frames, ignore_index=True))
+
+    print(f"[INFO] Run {run_id} added to history ({ROOT})")
+
+
+# ------------------ QUERY ------------------
+
+def _read_schema(table, schema):
+    """
+    One type per column across runs: float64 for NUMERIC_COLUMNS, string
+    for everything else (a column that was briefly stored as float64 is
+    read back as text, never the other way round).
+    """
+    for i, field in enumerate(schema):
+        wanted = pa.float64() if field.name in NUMERIC_COLUMNS[table] else pa.large_string()
+        if field.type != wanted:
+            schema = schema.set(i, field.with_type(wanted))
+    return schema
+
+
+def load(table, columns=None, companies=None, start=None, end=None):
+    """
+    Rows of table from runs between start and end (YYYY-MM-DD, inclusive),
+    reading only those partitions and the requested columns (plus run_date,
+    run_id and Company). Returns a DataFrame sorted by run.
+    """
+    base = ROOT / table
+
+    files = []
+    for part in sorted(base.glob("run_date=*")):
+        run_date = part.name.split("=", 1)[1]
+        if (start and run_date < start) or (end and run_date > end):
+            continue
+        files.extend(str(f) for f in sorted(part.glob("*.parquet")))
+
+    if not files:
+        return pd.DataFrame(columns=KEY_COLUMNS + list(columns or []))
+
+    # Footers only; runs can have different columns
+    schema = pa.unify_schemas([_read_schema(table, pq.read_schema(f)) for f in files])
+    schema = schema.append(pa.field("run_date", pa.string()))
+
+    dataset = ds.dataset(
+        files,
+        schema=schema,
+        partitioning=ds.partitioning(pa.schema([("run_date", pa.string())]), flavor="hive"),
+        partition_base_dir=str(base)
+    )
+
+    wanted = None
+    if columns is not None:
+        wanted = KEY_COLUMNS + [c for c in columns if c not in KEY_COLUMNS]
+        if table == "market_position":
+            # Runs from before a value column existed: parse its text column
+            wanted += [
+                MARKET_POSITION_VALUES[c][0] for c in columns
+                if c in MARKET_POSITION_VALUES and MARKET_POSITION_VALUES[c][0] not in wanted
+            ]
+        wanted = [c for c in wanted if c in schema.names]
+
+    row_filter = None
+    if companies:
+        row_filter = ds.field("Company").isin(list(companies))
+
+    df = dataset.to_table(columns=wanted, filter=row_filter).to_pandas()
+
+    if table == "market_position":
+        df = market_position_values(df)
+        if columns is not None:
+            df = df[[c for c in df.columns if c in KEY_COLUMNS + ["run_date"] or c in columns]]
+
+    return df.sort_values("run_id", kind="stable").reset_index(drop=True)
+
+
+def trend(table, column, companies=None, days=90, by="Company"):
+    """
+    column per run (rows) and `by` value (columns) over the last `days`.
+    """
+    start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    columns = [column] if by in KEY_COLUMNS else [column, by]
+
+    df = load(table, columns=columns, companies=companies, start=start)
+    if df.empty:
+        return df
+    return df.pivot_table(index="run_id", columns=by, values=column, aggfunc="first")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trend of one column across past runs")
+    parser.add_argument("table", choices=TABLES)
+    parser.add_argument("column")
+    parser.add_argument("--company", action="append", help="repeat for several companies")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--by", default="Company", help='e.g. "Model Name" for pricing')
+    args = parser.parse_args()
+
+    print(trend(args.table, args.column, companies=args.company, days=args.days, by=args.by).to_string())
@@ -0,0 +1,156 @@
+# http_cache.py
+# On-disk cache of HTTP GET responses, keyed by URL. Fresh entries (within
+# the source's TTL) are served without a request; stale ones are
+# revalidated with If-None-Match / If-Modified-Since, so an unchanged body
+# is never downloaded twice. Bodies are stored zlib-compressed.
+
+import os
+import time
+import json
+import zlib
+import hashlib
+from pathlib import Path
+import httpx
+
+import metrics
+from config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB, HTTP_CACHE_TTLS, DEFAULT_HTTP_CACHE_TTL
+
+CACHE_DIR = Path(HTTP_CACHE_DIR)
+
+# Response headers kept with the body
+STORED_HEADERS = ["content-type", "etag", "last-modified"]
+
+
+class Entry:
+    def __init__(self, meta, body):
+        self.meta = meta
+        self.body = body
+
+    def age(self):
+        return time.time() - self.meta["stored_at"]
+
+    def response(self):
+        """
+        The cached body as an httpx.Response for the final (redirected) URL.
+        """
+        return httpx.Response(
+            200,
+            headers=self.meta["headers"],
+            content=self.body,
+            request=httpx.Request("GET", self.meta["final_url"])
+        )
+
+    def conditional_headers(self):
+        headers = {}
+        if self.meta["headers"].get("etag"):
+            headers["If-None-Match"] = self.meta["headers"]["etag"]
+        if self.meta["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = self.meta["headers"]["last-modified"]
+        return headers
+
+
+def ttl_for(source):
+    return HTTP_CACHE_TTLS.get(source, DEFAULT_HTTP_CACHE_TTL)
+
+
+def _path(url):
+    return CACHE_DIR / f"{hashlib.sha256(url.encode()).hexdigest()}.bin"
+
+
+def load(url):
+    """
+    Cached Entry for url, or None.
+    """
+    try:
+        with open(_path(url), "rb") as f:
+            meta = json.loads(f.readline())
+            body = f.read()
+        if meta.get("compressed"):
+            body = zlib.decompress(body)
+    except (OSError, ValueError, zlib.error):
+        return None
+
+    return Entry(meta, body)
+
+
+def _write(url, meta, body):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _path(url)
+    tmp = path.with_suffix(f".{os.getpid()}.{time.monotonic_ns()}.tmp")
+
+    # Images are already compressed, keep whichever is smaller
+    packed = zlib.compress(body, 6)
+    meta["compressed"] = len(packed) < len(body)
+
+    try:
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n")
+            f.write(packed if meta["compressed"] else body)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[WARN] HTTP cache write skipped: {e}")
+        tmp.unlink(missing_ok=True)
+        return
+
+    metrics.incr("http_cache.writes")
+
+
+def put(url, resp):
+    """
+    Store a 200 response unless the server forbids it.
+    """
+    if resp.status_code != 200 or "no-store" in resp.headers.get("cache-control", ""):
+        return
+
+    meta = {
+        "url": url,
+        "final_url": str(resp.url),
+        "stored_at": time.time(),
+        "headers": {h: resp.headers[h] for h in STORED_HEADERS if h in resp.headers}
+    }
+    _write(url, meta, resp.content)
+
+
+def refresh(url, entry):
+    """
+    The server confirmed the entry (304): restart its TTL.
+    """
+    entry.meta["stored_at"] = time.time()
+    _write(url, entry.meta, entry.body)
+
+
+def hit(url, entry):
+    """
+    Count the body as not downloaded, and touch the entry so size
+    eviction drops the least recently used first.
+    """
+    try:
+        os.utime(_path(url))
+    except OSError:
+        pass
+
+    metrics.incr("http_cache.hits")
+    metrics.incr("http_cache.bytes_saved", len(entry.body))
+
+
+def evict(max_mb=HTTP_CACHE_MAX_MB):
+    """
+    Drop the least recently used entries until the cache fits in max_mb.
+    """
+    entries = []
+    for path in CACHE_DIR.glob("*.bin"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    max_bytes = max_mb * 1024 * 1024
+    total = sum(size for _, size, _ in entries)
+
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        metrics.incr("http_cache.evictions")
@@ -1,163 +1,166 @@
 # main.py
 
-from config import COMPANIES
-from market_position import scrape_market_position
+from config import COMPANIES, COMPANY_CONCURRENCY
+from market_position import scrape_market_position, rank_market_position
 from pricing import PricingScraper
-from schemes import scrape_schemes
-from discounts import scrape_discounts
+from schemes import find_scheme_images, extract_scheme_tables
+from discounts import scrape_all_discounts
+from utils import close_client
+from browser_session import BrowserSession
+import metrics
+import checkpoints
+import entity_store
+from workbook import export
+import history
+import asyncio
+import argparse
 from datetime import datetime
-import pandas as pd
 from pathlib import Path
 
-timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
-OUTPUT_FILE = Path(f"output/auto_market_data_{timestamp}.xlsx")
-
-OUTPUT_FILE.parent.mkdir(exist_ok=True)
+async def scrape_company(company, session, pricing_scraper, limit):
+    async with limit:
+        print(f"Scraping {company}...")
 
-print("Fetching Market Position once...")
-market_df = scrape_market_position(COMPANIES)
+        # Different sites, so the stages run side by side.
+        # Scheme images are only located here, OCR runs for all companies at once.
+        # Each result is checkpointed as soon as it is done, even if the
+        # other one fails.
+        outcomes = await asyncio.gather(
+            checkpoints.unit("pricing", company, lambda: pricing_scraper.get_company_pricing(company)),
+            checkpoints.unit("scheme_post", company, lambda: find_scheme_images(company, session)),
+            return_exceptions=True
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+
+async def scrape_discounts_stage(companies):
+    # Discount news is one batched stage for the companies not done yet
+    todo = [c for c in companies if not checkpoints.has("discounts", c)]
+    if not todo:
+        return
+
+    results = await scrape_all_discounts(todo)
+    for company, discounts_df in results.items():
+        checkpoints.save("discounts", company, discounts_df)
+
+    # Not checkpointed, so --resume fetches them again
+    failed = [c for c in todo if c not in results]
+    if failed:
+        raise RuntimeError(f"Discount news feed failed for {', '.join(failed)}")
+
+
+async def extract_schemes_stage(companies):
+    # OCR every remaining company's scheme images on one process pool
+    todo = [
+        c for c in companies
+        if checkpoints.has("scheme_post", c) and not checkpoints.has("schemes", c)
+    ]
+    if not todo:
+        return
+
+    schemes = await extract_scheme_tables([checkpoints.load("scheme_post", c) for c in todo])
+    for company, schemes_df in schemes.items():
+        checkpoints.save("schemes", company, schemes_df)
+
+    # Not checkpointed, so --resume downloads and OCRs them again
+    failed = [c for c in todo if c not in schemes]
+    if failed:
+        raise RuntimeError(f"Scheme image download or OCR failed for {', '.join(failed)}")
+
+
+def report_failures(labels, outcomes):
+    failed = [(label, e) for label, e in zip(labels, outcomes) if isinstance(e, BaseException)]
+    for label, e in failed:
+        print(f"[WARN] {label} failed: {e!r}")
+    return failed
+
+
+def load_results(companies):
+    """
+    Market position table and per-company results, from the checkpoints.
+    """
+    market_df = rank_market_position([checkpoints.load("market_position", c) for c in companies])
+
+    results = {}
+    for company in companies:
+        results[company] = {
+            "pricing": checkpoints.load("pricing", company),
+            "discounts": checkpoints.load("discounts", company),
+            "schemes": checkpoints.load("schemes", company)
+        }
+
+    return market_df, results
+
+
+async def run(companies):
+    # ✅ ONE BROWSER FOR THE WHOLE RUN, EACH STAGE GETS ITS OWN CONTEXT
+    session = await BrowserSession().start()
+
+    try:
+        pricing_scraper = await PricingScraper(session).start()
+        limit = asyncio.Semaphore(COMPANY_CONCURRENCY)
+
+        try:
+            print("Fetching Market Position once...")
+            # A failing unit must not close the browser under the others:
+            # every unit finishes (and checkpoints) before anything is raised
+            outcomes = await asyncio.gather(
+                scrape_market_position(companies, session),
+                scrape_discounts_stage(companies),
+                *(scrape_company(company, session, pricing_scraper, limit) for company in companies),
+                return_exceptions=True
+            )
+            failed = report_failures(["Market position", "Discounts", *companies], outcomes)
+        finally:
+            await pricing_scraper.close()
+    finally:
+        # ✅ CLOSE BROWSER ONCE AT END
+        await session.close()
 
-# ✅ START HEADLESS PRICING SCRAPER ONCE
-pricing_scraper = PricingScraper()
+    try:
+        await extract_schemes_stage(companies)
+    except Exception as e:
+        failed += report_failures(["Schemes"], [e])
+    finally:
+        await close_client()
 
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} stage(s) failed, completed units are checkpointed: "
+            f"rerun with --resume"
+        )
 
-with pd.ExcelWriter(OUTPUT_FILE, engine="openpyxl", mode="w") as writer:
-    all_models = []
+    # The workbook is always built from the checkpoints
+    return load_results(companies)
 
-    for company in COMPANIES:
-        print(f"Scraping {company}...")
-        start_row = 0
-        pricing_data = pricing_scraper.get_company_pricing(company)
-        sheet = company[:31]
-        written = False
-
-        # -----------------------------
-        # Market Position + Pricing
-        # -----------------------------
-        mp_df = market_df[market_df["Company"] == company]
-
-        if not mp_df.empty:
-            combined = mp_df.reset_index(drop=True)
-            combined.to_excel(
-                writer,
-                sheet_name=sheet,
-                startrow=start_row,
-                index=False
-            )
-
-            start_row += len(combined) + 3
-            written = True
-
-        # -----------------------------
-        # Discounts
-        # -----------------------------
-        discounts_df = scrape_discounts(company)
-        if not discounts_df.empty:
-            
-
-            discounts_df.to_excel(
-                writer,
-                sheet_name=sheet,
-                startrow=start_row,
-                index=False
-            )
 
-            start_row += len(discounts_df) + 3
-            written = True
-
-        # -----------------------------
-        # Schemes
-        # -----------------------------
-        schemes_df = scrape_schemes(company)
-        if not schemes_df.empty:
-        
-            schemes_df.to_excel(
-                writer,
-                sheet_name=sheet,
-                startrow=start_row,
-                index=False
-            )
-            start_row += len(schemes_df) + 3
-
-        # -----------------------------
-        # Pricing (Structured)
-        # -----------------------------
-        if pricing_data:
-        # Company-level summary
-            summary_df = pd.DataFrame([pricing_data["company_summary"]])
-            summary_df.to_excel(
-                writer,
-                sheet_name=sheet,
-                startrow=start_row,
-                index=False
-            )
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", action="store_true",
+                        help="reuse the checkpoints of an interrupted run")
+    args = parser.parse_args()
 
-            start_row += len(summary_df) + 2
+    checkpoints.start(resume=args.resume)
 
-            # Model-level pricing
-            models_df = pd.DataFrame(pricing_data["models"])
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
-            models_df.to_excel(
-                writer,
-                sheet_name=sheet,
-                startrow=start_row,
-                index=False
-            )
+    OUTPUT_FILE = Path(f"output/auto_market_data_{timestamp}.xlsx")
 
-            start_row += len(models_df) + 4
-
-            for model in pricing_data["models"]:
-                all_models.append({
-                    "Company": company,
-                    "Segment": model.get("Body Type", "Unknown"),
-                    "Model Name": model.get("Model Name"),
-                    "Price": model.get("Price")
-                })
-    # -----------------------------
-    # Segment-wise Comparison Sheet
-    # -----------------------------
-    if all_models:
-        df_all = pd.DataFrame(all_models)
-        segments = sorted(df_all["Segment"].dropna().unique())  # sort segments alphabetically
-        start_row = 0
-
-        for segment in segments:
-            title_df = pd.DataFrame(
-                [[f"Segment: {segment}", "", ""]],
-                columns=["Company", "Model Name", "Price"]
-            )
-            title_df.to_excel(
-                writer,
-                sheet_name="Segment Comparison",
-                startrow=start_row,
-                index=False,
-                header=False
-            )
-            start_row += 1
+    OUTPUT_FILE.parent.mkdir(exist_ok=True)
 
-            # Segment data
-            segment_df = (
-                df_all[df_all["Segment"] == segment]
-                [["Company", "Model Name", "Price"]]
-                .reset_index(drop=True)
-            )
+    market_df, results = asyncio.run(run(COMPANIES))
 
-            segment_df.to_excel(
-                writer,
-                sheet_name="Segment Comparison",
-                startrow=start_row,
-                index=False,
-                header=True
-            )
+    export(OUTPUT_FILE, market_df, results)
 
-            # Leave space after each segment
-            start_row += len(segment_df) + 3
+    print(f"✅ {OUTPUT_FILE.name} generated successfully")
 
-# ✅ CLOSE BROWSER ONCE AT END
-pricing_scraper.close()
+    history.append_run(timestamp, market_df, results)
 
-print(f"✅ {OUTPUT_FILE.name} generated successfully")
+    entity_store.report_changes()
+    metrics.report()
 
 
 
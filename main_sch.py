@@ -1,50 +1,92 @@
 # main_sch.py
  
-from schemes import scrape_schemes
-from config import COMPANIES
+from schemes import find_scheme_images, extract_scheme_tables
+from config import COMPANIES, COMPANY_CONCURRENCY
+from utils import close_client
+from browser_session import BrowserSession
+from workbook import write_sheets
+import history
+import asyncio
+import argparse
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
-from openpyxl import load_workbook
-
-# Timestamped output
-timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-OUTPUT_FILE = Path(f"output/test_schemes_{timestamp}.xlsx")
-OUTPUT_FILE.parent.mkdir(exist_ok=True)
  
 
-for company in COMPANIES:
-    print(f"Scraping schemes for {company}...")
-    schemes_df = scrape_schemes(company)
-
-    if schemes_df.empty:
-        print(f"No data for {company}")
-        continue
-
-    sheet_name = company[:31]
-
-    if OUTPUT_FILE.exists():
-        with pd.ExcelWriter(OUTPUT_FILE, engine="openpyxl", mode="a", if_sheet_exists="overlay") as writer:
-            if sheet_name in writer.book.sheetnames:
-                start_row = writer.book[sheet_name].max_row + 3
-            else:
-                start_row = 0
-
-            schemes_df.to_excel(
-                writer,
-                sheet_name=sheet_name,
-                index=False,
-                startrow=start_row,
-                header=(start_row == 0)
-            )
+async def find_company_images(company, session, limit):
+    async with limit:
+        print(f"Scraping schemes for {company}...")
+        return await find_scheme_images(company, session)
+
+
+async def scrape_all(companies):
+    limit = asyncio.Semaphore(COMPANY_CONCURRENCY)
+    try:
+        async with BrowserSession() as session:
+            scheme_posts = await asyncio.gather(*(find_company_images(c, session, limit) for c in companies))
+
+        # OCR every company's images on one process pool
+        return await extract_scheme_tables(scheme_posts)
+    finally:
+        await close_client()
+
+
+def write_sidecar(path, frames):
+    """
+    All companies' scheme tables in one Parquet file. OCR columns differ
+    per company and hold mixed types, so everything is stored as strings.
+    """
+    # OCR can repeat a header; concat and Parquet need unique string names
+    tables = [history.unique_columns(df) for df in frames.values()]
+
+    try:
+        combined = pd.concat(tables, ignore_index=True)
+        combined.astype("string").to_parquet(path, index=False)
+    except Exception as e:
+        print(f"[WARN] Schemes sidecar not written: {e}")
+        return
+
+    print(f"✅ Schemes sidecar generated: {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sidecar", action="store_true",
+                        help="also write all scheme tables to a Parquet file")
+    args = parser.parse_args()
+
+    # Timestamped output
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    OUTPUT_FILE = Path(f"output/test_schemes_{timestamp}.xlsx")
+    OUTPUT_FILE.parent.mkdir(exist_ok=True)
+
+    all_schemes = asyncio.run(scrape_all(COMPANIES))
+
+    # One sheet per company with data, written in a single pass
+    frames = {}
+    for company in COMPANIES:
+        schemes_df = all_schemes.get(company)
+
+        if schemes_df is None:
+            print(f"[WARN] Scheme images could not be downloaded or OCR'd for {company}")
+            continue
+
+        if schemes_df.empty:
+            print(f"No data for {company}")
+            continue
+
+        frames[company[:31]] = schemes_df
+
+    if write_sheets(OUTPUT_FILE, frames):
+        print(f"✅ Schemes Excel generated: {OUTPUT_FILE}")
     else:
-        with pd.ExcelWriter(OUTPUT_FILE, engine="openpyxl", mode="w") as writer:
-            schemes_df.to_excel(
-                writer,
-                sheet_name=sheet_name,
-                index=False
-            )
-
-print(f"✅ Schemes Excel generated: {OUTPUT_FILE}")
- 
- 
\ No newline at end of file
+        print("No scheme data, Excel not generated")
+
+    if args.sidecar and frames:
+        write_sidecar(OUTPUT_FILE.with_suffix(".parquet"), frames)
+
+    if frames:
+        history.append_table(
+            "schemes", timestamp,
+            pd.concat([history.unique_columns(df) for df in frames.values()], ignore_index=True)
+        )
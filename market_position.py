@@ -1,26 +1,16 @@
 import pandas as pd
 import re
-from playwright.sync_api import sync_playwright
- 
-# -------------------------------------------------
-# Helpers
-# -------------------------------------------------
-COMPANY_URLS = {
-    "Maruti Suzuki": "maruti-suzuki-cars",
-    "Hyundai": "cars/Hyundai",
-    "Mahindra": "cars/Mahindra",
-    "Kia": "cars/Kia",
-    "MG Motor": "cars/MG",
-    "Toyota": "toyota-cars",
-    "Honda": "cars/Honda",
-    "Renault": "cars/Renault",
-    "Nissan": "cars/Nissan",
-    "Skoda": "cars/Skoda",
-    "Volkswagen": "cars/Volkswagen",
-    "BYD": "cars/BYD",
-    "Volvo": "cars/Volvo",
-    "Tata Motors": "cars/Tata"
-}
+import asyncio
+from page_pool import PagePool
+from request_blocking import policy_for
+import checkpoints
+from config import SPEC_POOL_SIZE
+from brand_page import (
+    get_brand_page,
+    extract_price_range,
+    extract_rating,
+    extract_service_centers,
+)
  
 # -------------------------------------------------
 # Pricing SCRAPER
@@ -88,34 +78,19 @@ def average_price_to_score(avg_price):
 #         return None, None
  
 #     return float(match.group(1)), float(match.group(2))
-def fetch_min_max_price(page, company: str):
-    slug = COMPANY_URLS.get(company)
-    if not slug:
+async def fetch_min_max_price(pool, company: str):
+    snapshot = await get_brand_page(pool, company)
+    if snapshot is None:
         return None, None
  
-    page.goto(f"https://www.cardekho.com/{slug}", timeout=60000)
+    min_price, max_price, status = extract_price_range(snapshot)
  
-    try:
-        page.wait_for_selector("div.gs_readmore p", timeout=15000)
-    except:
+    if status == "missing":
         print(f"[WARN] Price text not found for {company}")
-        return None, None
- 
-    text = page.locator("div.gs_readmore p").first.inner_text()
- 
-    matches = re.findall(
-        r"₹\s*([\d.]+)\s*(Lakh|Cr)",
-        text,
-        re.IGNORECASE
-    )
- 
-    if len(matches) >= 2:
-        min_price = f"{matches[0][0]} {matches[0][1]}"
-        max_price = f"{matches[1][0]} {matches[1][1]}"
-        return min_price, max_price
+    elif status == "unmatched":
+        print(f"[WARN] Price pattern not matched for {company}")
  
-    print(f"[WARN] Price pattern not matched for {company}")
-    return None, None
+    return min_price, max_price
  
  
 # -------------------------------------------------
@@ -145,22 +120,13 @@ def fetch_min_max_price(page, company: str):
 #     except:
 #         return None, None, 3
  
-def fetch_brand_overall_rating(page, company):
-    slug = COMPANY_URLS.get(company)
-    if not slug:
+async def fetch_brand_overall_rating(pool, company):
+    snapshot = await get_brand_page(pool, company)
+    if snapshot is None:
         return None, None, 3
  
-    page.goto(f"https://www.cardekho.com/{slug}", timeout=60000)
- 
     try:
-        page.wait_for_selector("div.startRating", timeout=15000)
- 
-        rating_text = page.locator("span.ratingStarNew").first.inner_text()
-        rating = float(re.findall(r"[\d.]+", rating_text)[0])
- 
-        reviews_text = page.locator("span.bottomText").first.inner_text()
-        reviews = reviews_text.replace("|", "").strip()
- 
+        rating, reviews = extract_rating(snapshot)
         score = rating_to_score(rating, reviews)
  
         return rating, reviews, score
@@ -190,16 +156,21 @@ def fetch_brand_overall_rating(page, company):
 #     else:
 #         return 2
  
-def rating_to_score(rating, reviews_text):
+def reviews_text_to_count(reviews_text):
+    """
+    Review count from text like "9.2K reviews" (9200), or None.
+    """
     try:
         reviews_text = reviews_text.lower()
  
         if "k" in reviews_text:
-            count = float(re.findall(r"[\d.]+", reviews_text)[0]) * 1000
-        else:
-            count = float(re.findall(r"\d+", reviews_text)[0])
+            return float(re.findall(r"[\d.]+", reviews_text)[0]) * 1000
+        return float(re.findall(r"\d+", reviews_text)[0])
     except:
-        count = 0
+        return None
+ 
+def rating_to_score(rating, reviews_text):
+    count = reviews_text_to_count(reviews_text) or 0
  
     if rating >= 4.5 and count >= 3000:
         return 5
@@ -215,33 +186,19 @@ def rating_to_score(rating, reviews_text):
 # Service SCRAPER
 # -------------------------------------------------
  
-def fetch_service_centers(page, company: str):
-    slug = COMPANY_URLS.get(company)
-    if not slug:
+async def fetch_service_centers(pool, company: str):
+    snapshot = await get_brand_page(pool, company)
+    if snapshot is None:
         return None
  
-    url = f"https://www.cardekho.com/{slug}"
-    page.goto(url, timeout=60000)
+    count, status = extract_service_centers(snapshot)
  
-    try:
-        page.wait_for_selector("section.KeyHighlights table", timeout=15000)
-    except:
+    if status == "missing":
         print(f"[WARN] Key Highlights not found for {company}")
-        return None
- 
-    rows = page.locator("section.KeyHighlights table tbody tr")
- 
-    for i in range(rows.count()):
-        key = rows.nth(i).locator("td").nth(0).inner_text().strip().lower()
-        value = rows.nth(i).locator("td").nth(1).inner_text().strip()
- 
-        if key == "service centers":
-            # Extract number safely
-            match = re.search(r"\d+", value.replace(",", ""))
-            return int(match.group()) if match else None
+    elif status == "row_missing":
+        print(f"[WARN] Service Centers row missing for {company}")
  
-    print(f"[WARN] Service Centers row missing for {company}")
-    return None
+    return count
  
 def service_centers_to_review_and_score(count):
     if count is None:
@@ -262,57 +219,70 @@ def service_centers_to_review_and_score(count):
 # MAIN FUNCTION
 # -------------------------------------------------
  
-def scrape_market_position(companies):
-    data = []
+async def scrape_market_row(pool, company):
+    print(f"[Market Position] {company}")
  
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+    min_p, max_p = await fetch_min_max_price(pool, company)
+    avg_price = compute_average_price(min_p, max_p)
+    price_score = average_price_to_score(avg_price)
  
-        for company in companies:
-            print(f"[Market Position] {company}")
+    overall_rating, review_count, review_score = await fetch_brand_overall_rating(pool, company)
  
-            min_p, max_p = fetch_min_max_price(page, company)
-            avg_price = compute_average_price(min_p, max_p)
-            price_score = average_price_to_score(avg_price)
  
-            overall_rating, review_count, review_score = fetch_brand_overall_rating(page, company)
+    service_centers = await fetch_service_centers(pool, company)
+    service_review, service_score = service_centers_to_review_and_score(service_centers)
  
  
-            service_centers = fetch_service_centers(page, company)
-            service_review, service_score = service_centers_to_review_and_score(service_centers)
- 
- 
-            composite = (
-                price_score * 0.3 +
-                review_score * 0.4 +
-                service_score * 0.3
-            )
+    composite = (
+        price_score * 0.3 +
+        review_score * 0.4 +
+        service_score * 0.3
+    )
  
  
  
-            data.append({
-                "Company": company,
-                "Section": "Market Position",
-                "Min Price (Lakh)": min_p,
-                "Max Price (Lakh)": max_p,
-                "Average Price (Lakh)": avg_price,
-                "Price Score": price_score,
-                "Overall Rating": overall_rating,
-                "Overall Reviews Count": review_count,
-                "Review Score": review_score,
-                "Number of Service Centers": service_centers,
-                "Overall After Sales Service Review": service_review,
-                "Service Score": service_score,
-                "Composite Score": round(composite, 2)
-            })
+    return {
+        "Company": company,
+        "Section": "Market Position",
+        "Min Price (Lakh)": min_p,
+        "Max Price (Lakh)": max_p,
+        "Average Price (Lakh)": avg_price,
+        "Price Score": price_score,
+        "Overall Rating": overall_rating,
+        "Overall Reviews Count": review_count,
+        "Review Score": review_score,
+        "Number of Service Centers": service_centers,
+        "Overall After Sales Service Review": service_review,
+        "Service Score": service_score,
+        "Composite Score": round(composite, 2)
+    }
  
-        browser.close()
  
+def rank_market_position(data):
     df = pd.DataFrame(data)
     df = df.sort_values("Composite Score", ascending=False).reset_index(drop=True)
     df["Market Position"] = df.index + 1
     df.drop(columns=["Composite Score"], inplace=True)
  
     return df
- 
\ No newline at end of file
+ 
+ 
+async def scrape_market_position(companies, session):
+    # Pages (and the context) are only opened if a brand page needs the browser
+    pool = PagePool(session, SPEC_POOL_SIZE, policy_for("market_position"))
+ 
+    try:
+        # Each row is checkpointed as soon as it is scraped; the pool stays
+        # open until every row is done, even if one fails
+        data = await asyncio.gather(*(
+            checkpoints.unit("market_position", company, lambda company=company: scrape_market_row(pool, company))
+            for company in companies
+        ), return_exceptions=True)
+    finally:
+        await pool.close()
+
+    for row in data:
+        if isinstance(row, BaseException):
+            raise row
+ 
+    return rank_market_position(data)
@@ -0,0 +1,47 @@
+# metrics.py
+# Per-run counters and timings shared by all scrapers
+
+import threading
+from collections import defaultdict
+
+COUNTERS = defaultdict(int)
+TIMINGS = defaultdict(list)
+VALUES = defaultdict(list)
+
+# Safe to call from worker threads
+_lock = threading.Lock()
+
+
+def incr(name, amount=1):
+    with _lock:
+        COUNTERS[name] += amount
+
+
+def add_timing(name, seconds):
+    with _lock:
+        TIMINGS[name].append(seconds)
+
+
+def observe(name, value):
+    """
+    One sample of a unitless distribution (e.g. round trips per page).
+    """
+    with _lock:
+        VALUES[name].append(value)
+
+
+def report():
+    print("\n========== RUN STATS ==========")
+
+    for name in sorted(COUNTERS):
+        print(f"{name}: {COUNTERS[name]}")
+
+    for name in sorted(TIMINGS):
+        values = TIMINGS[name]
+        total = sum(values)
+        print(f"{name}: n={len(values)} total={total:.2f}s avg={total / len(values):.2f}s")
+
+    for name in sorted(VALUES):
+        values = VALUES[name]
+        print(f"{name}: n={len(values)} avg={sum(values) / len(values):.2f} "
+              f"min={min(values)} max={max(values)}")
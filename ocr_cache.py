@@ -0,0 +1,90 @@
+# ocr_cache.py
+# On-disk cache of cleaned OCR tables, keyed by a hash of the image bytes
+# and the OCR engine configuration. Tables are stored as Parquet.
+
+import os
+import time
+import hashlib
+import json
+from pathlib import Path
+import pandas as pd
+
+import metrics
+from config import OCR_CACHE_DIR, OCR_CACHE_MAX_MB, OCR_CACHE_MAX_AGE_DAYS
+
+CACHE_DIR = Path(OCR_CACHE_DIR)
+
+
+def cache_key(content, engine_config):
+    h = hashlib.sha256()
+    h.update(content)
+    h.update(json.dumps(engine_config, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def _path(key):
+    return CACHE_DIR / f"{key}.parquet"
+
+
+def get(key):
+    """
+    Cached DataFrame for key, or None on a miss.
+    """
+    path = _path(key)
+    try:
+        df = pd.read_parquet(path)
+    except (FileNotFoundError, OSError):
+        metrics.incr("ocr_cache.misses")
+        return None
+
+    # Touch on hit so size eviction drops the least recently used first
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    metrics.incr("ocr_cache.hits")
+    return df
+
+
+def put(key, df):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _path(key)
+    tmp = path.with_suffix(f".{os.getpid()}.{time.monotonic_ns()}.tmp")
+
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    except Exception as e:
+        # OCR output can have duplicate or mixed-type columns Parquet rejects
+        print(f"[WARN] OCR cache write skipped: {e}")
+        tmp.unlink(missing_ok=True)
+        return
+
+    metrics.incr("ocr_cache.writes")
+    evict()
+
+
+def evict(max_mb=OCR_CACHE_MAX_MB, max_age_days=OCR_CACHE_MAX_AGE_DAYS):
+    """
+    Drop entries older than max_age_days, then the least recently used
+    ones until the cache fits in max_mb.
+    """
+    entries = []
+    for path in CACHE_DIR.glob("*.parquet"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    cutoff = time.time() - max_age_days * 86400
+    max_bytes = max_mb * 1024 * 1024
+    total = sum(size for _, size, _ in entries)
+
+    for mtime, size, path in sorted(entries):
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        metrics.incr("ocr_cache.evictions")
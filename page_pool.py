@@ -0,0 +1,64 @@
+# page_pool.py
+# Bounded pool of Playwright pages on one browser context, for fetching
+# many URLs concurrently. Per-host limits come from utils.host_limit.
+# The context (and the browser) are only created when a page is needed.
+
+import asyncio
+
+from utils import host_limit
+
+
+class PagePool:
+    def __init__(self, session, size, policy=None):
+        self.session = session
+        self.size = size
+        self.policy = policy
+        self.context = None
+        self.context_lock = asyncio.Lock()
+        self.idle = asyncio.Queue()
+        self.pages = []
+        # Slots taken, counted before the awaits that open the page
+        self.opened = 0
+
+    async def _get_context(self):
+        async with self.context_lock:
+            if self.context is None:
+                self.context = await self.session.new_context(self.policy)
+            return self.context
+
+    async def _acquire(self):
+        # Open pages lazily, up to the pool size
+        if self.idle.empty() and self.opened < self.size:
+            self.opened += 1
+            try:
+                context = await self._get_context()
+                page = await context.new_page()
+            except BaseException:
+                self.opened -= 1
+                raise
+            page.set_default_timeout(30000)
+            self.pages.append(page)
+            return page
+        return await self.idle.get()
+
+    async def run(self, fn, url):
+        """
+        Run fn(page, url) on the next free page.
+        """
+        page = await self._acquire()
+        try:
+            async with host_limit(url):
+                return await fn(page, url)
+        finally:
+            self.idle.put_nowait(page)
+
+    async def close(self):
+        for page in self.pages:
+            await page.close()
+        self.pages = []
+        self.opened = 0
+
+        # The browser belongs to the session, only the context is ours
+        if self.context is not None:
+            await self.context.close()
+            self.context = None
@@ -1,54 +1,77 @@
-from playwright.sync_api import sync_playwright
-import re
- 
-COMPANY_URLS = {
-    "Maruti Suzuki": "maruti-suzuki-cars",
-    "Hyundai": "cars/Hyundai",
-    "Mahindra": "cars/Mahindra",
-    "Kia": "cars/Kia",
-    "MG Motor": "cars/MG",
-    "Toyota": "toyota-cars",
-    "Honda": "cars/Honda",
-    "Renault": "cars/Renault",
-    "Nissan": "cars/Nissan",
-    "Skoda": "cars/Skoda",
-    "Volkswagen": "cars/Volkswagen",
-    "BYD": "cars/BYD",
-    "Volvo": "cars/Volvo",
-    "Tata Motors": "cars/Tata"
-}
+import asyncio
+import time
+import metrics
+import spec_strategy
+import entity_store
+from brand_page import get_brand_page, extract_summary, extract_model_cards, missing_selector
+from page_pool import PagePool
+from request_blocking import policy_for
+from config import SPEC_POOL_SIZE, HTTP_FAST_PATH
+from utils import get_soup, clean
+from waits import wait_for_selector
+ 
+SPEC_ROWS_SELECTOR = "div[id^='Keyspecification'] table.keyfeature tr"
+FEATURE_ROWS_SELECTOR = "div[id^='Keyfeatures'] table.keyfeature tr"
+ 
+# Whole table in one browser round trip instead of ~5 RPCs per row.
+# Same semantics as tds.nth(0/1).inner_text() and tds.nth(1).locator("i").
+TABLE_ROWS_JS = """
+rows => rows
+    .map(tr => tr.querySelectorAll('td'))
+    .filter(tds => tds.length >= 2)
+    .map(tds => ({
+        key: tds[0].innerText.trim(),
+        value: tds[1].innerText.trim(),
+        tick: tds[1].querySelector('i') !== null
+    }))
+"""
+ 
+ 
+def extract_specs_and_features(soup):
+    """
+    Spec and feature tables from server-rendered HTML, same rows as the
+    Playwright path reads.
+    """
+    specs = {}
+    features = []
+ 
+    for row in soup.select(SPEC_ROWS_SELECTOR):
+        tds = row.find_all("td")
+        if len(tds) >= 2:
+            specs[clean(tds[0].get_text(" "))] = clean(tds[1].get_text(" "))
+ 
+    for row in soup.select(FEATURE_ROWS_SELECTOR):
+        tds = row.find_all("td")
+        if len(tds) < 2:
+            continue
+ 
+        # Tick icon inside second column
+        if tds[1].find("i") is not None:
+            features.append(clean(tds[0].get_text(" ")))
+ 
+    return specs, features
+ 
  
 class PricingScraper:
-    def __init__(self):
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=True)
-        self.page = self.browser.new_page()
- 
-    def get_company_pricing(self, company):
-        slug = COMPANY_URLS.get(company)
-        if not slug:
+    def __init__(self, session, spec_pool_size=SPEC_POOL_SIZE):
+        self.session = session
+        self.spec_pool_size = spec_pool_size
+ 
+    async def start(self):
+        # Brand pages and spec pages share one bounded pool of pages,
+        # only opened when the HTTP fast path falls short
+        self.page_pool = PagePool(self.session, self.spec_pool_size, policy_for("pricing"))
+        return self
+ 
+    async def get_company_pricing(self, company):
+        snapshot = await get_brand_page(self.page_pool, company)
+        if snapshot is None:
             return None
  
-        self.page.goto(f"https://www.cardekho.com/{slug}", timeout=60000)
-        self.page.wait_for_timeout(5000)
- 
         # -------------------------
         # SCRAPE SUMMARY TEXT
         # -------------------------
-        summary_text = self.page.locator(
-            "div.carSummary p"
-        ).first.inner_text()
- 
-        total_models = "Not found"
-        types_of_cars = "Not found"
- 
-        tm = re.search(r"total of (\d+) car models", summary_text)
-        if tm:
-            total_models = int(tm.group(1))
- 
-        tc = re.search(r"including (.+)", summary_text)
-        if tc:
-            types_of_cars = tc.group(1).strip(".")
+        total_models, types_of_cars = extract_summary(snapshot)
  
         company_summary = {
             "Section": "Pricing Summary",
@@ -60,34 +83,27 @@ class PricingScraper:
         # -------------------------
         # SCRAPE MODEL PRICES
         # -------------------------
-        for _ in range(5):
-            self.page.mouse.wheel(0, 3000)
-            self.page.wait_for_timeout(1500)
- 
-        cards = self.page.locator("h3").locator("xpath=ancestor::div[contains(@class,'listView')]")
- 
         model_rows = []
- 
-        for i in range(cards.count()):
-            card = cards.nth(i)
- 
-            name = card.locator("h3").inner_text().strip()
-            model_url = card.locator("a").first.get_attribute("href")
- 
-            if model_url and model_url.startswith("/"):
-                model_url = "https://www.cardekho.com" + model_url
- 
-            price = "Not Available"
- 
-            if card.locator("div.price").count() > 0:
-                price = card.locator("div.price").inner_text().strip()
+        cards = extract_model_cards(snapshot)
+ 
+        # Spec pages are fetched concurrently, results come back in card order.
+        # A failure is raised only once the other fetches are done.
+        spec_results = await asyncio.gather(*(
+            self.get_card_specs(company, card) for card in cards
+        ), return_exceptions=True)
+        for result in spec_results:
+            if isinstance(result, BaseException):
+                raise result
+        entity_store.finish_company(company, {card["url"] for card in cards})
+ 
+        for card, (specs, features) in zip(cards, spec_results):
+            name = card["name"]
+            price = card["price"]
  
             # fuel_type = "Unknown"
             # if card.locator("div.dotlist span").count() > 0:
             #     fuel_type = card.locator("div.dotlist span").first.inner_text().strip()
  
-            specs, features = self.get_specs_and_features(model_url)
- 
             row = {
                 "Section": "Pricing",
                 "Model Name": name,
@@ -106,74 +122,137 @@ class PricingScraper:
         }
  
  
-    def get_specs_and_features(self, model_url):
-        page = self.browser.new_page()
-        page.set_default_timeout(30000)
- 
+    async def get_card_specs(self, company, card):
+        """
+        Specs from the entity store when the listing card is unchanged and
+        fresh, otherwise fetched (and stored if the fetch found any).
+        """
+        if not card["url"]:
+            # No link to a spec page, nothing to store or fetch
+            return {}, ""
+ 
+        stored = entity_store.lookup(company, card)
+        if stored is not None:
+            return stored
+ 
+        specs, features = await self.get_specs_and_features(card["url"])
+        if specs:
+            entity_store.store(company, card, specs, features)
+        return specs, features
+ 
+    def spec_urls(self, model_url):
+        """
+        (strategy key, [(strategy, url)]) with the pattern known to work
+        for this brand / URL shape first.
+        """
+        key = spec_strategy.url_key(model_url)
         model_url = self.normalize_model_url(model_url)
  
-        possible_urls = [
-        model_url + "/specs",
-        model_url.replace(".htm", "") + "-specifications.htm"
-        ]
+        urls = {
+        "specs": model_url + "/specs",
+        "specifications": model_url.replace(".htm", "") + "-specifications.htm"
+        }
+        return key, [(strategy, urls[strategy]) for strategy in spec_strategy.ordered(key)]
+ 
+    async def get_specs_and_features(self, model_url):
+        if HTTP_FAST_PATH:
+            result = await self.fetch_specs_with_http(model_url)
+            if result is not None:
+                metrics.incr("fast_path.specs.http")
+                return result
+ 
+        metrics.incr("fast_path.specs.browser")
+        return await self.page_pool.run(self.fetch_specs_and_features, model_url)
+ 
+    async def fetch_specs_with_http(self, model_url):
+        """
+        (specs, features) from the first spec URL whose server-rendered HTML
+        has both tables, or None to fall back to the browser.
+        """
+        key, possible_urls = self.spec_urls(model_url)
+ 
+        for strategy, url in possible_urls:
+            try:
+                soup = await get_soup(url, source="cardekho")
+            except Exception:
+                continue
+ 
+            missing = missing_selector(soup, [SPEC_ROWS_SELECTOR, FEATURE_ROWS_SELECTOR])
+            if missing:
+                metrics.incr(f"fast_path.missing.{missing}")
+                continue
+ 
+            spec_strategy.learn(key, strategy)
+            specs, features = extract_specs_and_features(soup)
+            print(f"[INFO] Specs via HTTP: {url} ({len(specs)} specs, {len(features)} features)")
+            return specs, ", ".join(features)
+ 
+        return None
+ 
+    async def fetch_specs_and_features(self, page, model_url):
+        key, possible_urls = self.spec_urls(model_url)
  
         specs = {}
         features = []
  
-        for url in possible_urls:
+        for attempt, (strategy, url) in enumerate(possible_urls):
+            # Browser round trips completed for this page
+            rpcs = 0
+            start = time.monotonic()
             try:
                 print(f"[INFO] Trying URL: {url}")
-                page.goto(url, wait_until="domcontentloaded")
+                await page.goto(url, wait_until="domcontentloaded")
+                rpcs += 1
  
-                page.wait_for_timeout(3000)
-                page.mouse.wheel(0, 3000)
-                page.wait_for_timeout(3000)
+                await wait_for_selector(page, "specs.load", "div[id^='Keyspecification']", ceiling_ms=3000)
+                rpcs += 1
+                await page.mouse.wheel(0, 3000)
+                rpcs += 1
+                await wait_for_selector(page, "specs.scroll", "div[id^='Keyfeatures']", ceiling_ms=3000)
+                rpcs += 1
  
                 # =========================
                 # KEY SPECIFICATIONS
                 # =========================
-                page.wait_for_selector("div[id^='Keyspecification']", timeout=15000)
-                spec_rows = page.locator("div[id^='Keyspecification'] table.keyfeature tr")
-                print(f"[DEBUG] Spec rows found: {spec_rows.count()}")
- 
-                for i in range(spec_rows.count()):
-                    tds = spec_rows.nth(i).locator("td")
-                    if tds.count() >= 2:
-                        key = tds.nth(0).inner_text().strip()
-                        value = tds.nth(1).inner_text().strip()
-                        specs[key] = value
-                        print(f"[SPEC] {key} = {value}")
+                await page.wait_for_selector("div[id^='Keyspecification']", timeout=15000)
+                rpcs += 1
+                spec_rows = await page.locator(SPEC_ROWS_SELECTOR).evaluate_all(TABLE_ROWS_JS)
+                rpcs += 1
+                print(f"[DEBUG] Spec rows found: {len(spec_rows)}")
+ 
+                for row in spec_rows:
+                    specs[row["key"]] = row["value"]
+                    print(f"[SPEC] {row['key']} = {row['value']}")
  
                 # =========================
                 # KEY FEATURES
                 # =========================
-                page.wait_for_selector("div[id^='Keyfeatures']", timeout=15000)
-                feature_rows = page.locator("div[id^='Keyfeatures'] table.keyfeature tr")
-                print(f"[DEBUG] Feature rows found: {feature_rows.count()}")
- 
-                for i in range(feature_rows.count()):
-                    row = feature_rows.nth(i)
-                    tds = row.locator("td")
- 
-                    if tds.count() < 2:
-                        continue
- 
-                    feature_name = tds.nth(0).inner_text().strip()
- 
-                    # Check for tick icon inside second column
-                    has_check_icon = tds.nth(1).locator("i").count() > 0
- 
-                    if has_check_icon:
-                        features.append(feature_name)
-                        print(f"[FEATURE] {feature_name} = YES")
- 
+                await page.wait_for_selector("div[id^='Keyfeatures']", timeout=15000)
+                rpcs += 1
+                feature_rows = await page.locator(FEATURE_ROWS_SELECTOR).evaluate_all(TABLE_ROWS_JS)
+                rpcs += 1
+                print(f"[DEBUG] Feature rows found: {len(feature_rows)}")
+ 
+                for row in feature_rows:
+                    # Tick icon inside second column
+                    if row["tick"]:
+                        features.append(row["key"])
+                        print(f"[FEATURE] {row['key']} = YES")
+ 
+                spec_strategy.record_success(key, strategy, first_try=attempt == 0)
                 break  # ✅ success, stop trying other URLs
  
             except Exception as e:
                 print(f"[WARN] Failed on {url}: {e}")
+                spec_strategy.record_failure(key, strategy, time.monotonic() - start)
                 continue
  
-        page.close()
+            finally:
+                # One spec URL load (a page attempt), successful or not
+                metrics.incr("specs.browser_page_loads")
+                metrics.incr("specs.browser_rpcs", rpcs)
+                metrics.observe("specs.browser_rpcs_per_page", rpcs)
+ 
         return specs, ", ".join(features)
  
     # def get_key_features(self, model_url):
@@ -223,11 +302,11 @@ class PricingScraper:
     #     page.close()
     #     return ", ".join(features)
  
-    def close(self):
+    async def close(self):
+        spec_strategy.save()
+        await self.page_pool.close()
         if hasattr(self, "model_page"):
-            self.model_page.close()
-        self.browser.close()
-        self.playwright.stop()
+            await self.model_page.close()
  
     def normalize_model_url(self,model_url):
         # carmodels → seo
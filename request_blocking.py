@@ -0,0 +1,74 @@
+# request_blocking.py
+# Request interception for browser contexts: aborts resource types and
+# ad/tracker domains the scrapers never read. Policies are per scraper
+# (config.REQUEST_BLOCKING) and attached by BrowserSession.new_context.
+
+from urllib.parse import urlparse
+
+import metrics
+from config import REQUEST_BLOCKING, REQUEST_BLOCKING_AUDIT
+
+
+class BlockPolicy:
+    def __init__(self, name, resource_types=(), domains=(), audit=REQUEST_BLOCKING_AUDIT):
+        self.name = name
+        self.resource_types = set(resource_types)
+        self.domains = list(domains)
+        # Audit: let blocked requests through and measure what blocking saves
+        self.audit = audit
+        self.audited = set()
+
+    def block_reason(self, request):
+        if request.resource_type in self.resource_types:
+            return request.resource_type
+
+        host = urlparse(request.url).hostname or ""
+        for domain in self.domains:
+            if host == domain or host.endswith("." + domain):
+                return "domain"
+        return None
+
+    async def handle(self, route):
+        request = route.request
+        reason = self.block_reason(request)
+
+        if reason is None:
+            await route.continue_()
+            return
+
+        metrics.incr("blocking.blocked")
+        metrics.incr(f"blocking.blocked.{self.name}.{reason}")
+
+        if self.audit:
+            self.audited.add(request)
+            await route.continue_()
+        else:
+            await route.abort()
+
+    async def on_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+
+        size = sizes["responseBodySize"] + sizes["responseHeadersSize"]
+
+        if request in self.audited:
+            self.audited.discard(request)
+            metrics.incr("blocking.bytes_avoided", size)
+        else:
+            metrics.incr("browser.bytes_downloaded", size)
+
+    async def attach(self, context):
+        await context.route("**/*", self.handle)
+        context.on("requestfinished", self.on_finished)
+
+
+def policy_for(scraper):
+    """
+    BlockPolicy for the scraper, or None if nothing is blocked for it.
+    """
+    rules = REQUEST_BLOCKING.get(scraper)
+    if not rules:
+        return None
+    return BlockPolicy(scraper, **rules)
@@ -1,42 +1,57 @@
 import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
-import requests
+import asyncio
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup
 import pandas as pd
 import re
 from datetime import datetime
-from playwright.sync_api import sync_playwright
 from PIL import Image
 from io import BytesIO
 import numpy as np
-import cv2
-# from paddleocr import PaddleOCR
-from paddleocr import PPStructure
-import tempfile
+from waits import wait_for_stable_count
+from utils import fetch, host_limit
+from config import OCR_WORKERS, OCR_THREADS_PER_WORKER, COMPANY_NAME_MAP
+import metrics
+import ocr_cache
+from request_blocking import policy_for
  
  
-# ------------------ EASYOCR INIT ------------------
-table_engine = PPStructure(show_log=False, layout=False, ocr=True, table=True)
+# ------------------ OCR ENGINE (LAZY) ------------------
+# PPStructure takes seconds and hundreds of MB to load, so it is only
+# built the first time an image actually needs OCR. OCR runs in worker
+# processes (see ocr_pool), each with its own engine.
+table_engine = None
  
+# Load time not yet sent back to the parent: a worker's metrics never
+# reach the parent's report, so it rides along with the next OCR result
+unreported_load_seconds = None
  
-# ------------------ CONFIG ------------------
+# Also part of the OCR cache key, so changing it invalidates cached tables
+TABLE_ENGINE_CONFIG = {"show_log": False, "layout": False, "ocr": True, "table": True}
  
-COMPANY_NAME_MAP = {
-    "Maruti Suzuki": ["maruti", "nexa"],
-    "Hyundai": ["hyundai"],
-    "Mahindra": ["mahindra"],
-    "Kia": ["kia"],
-    "MG Motor": ["mg"],
-    "Toyota": ["toyota"],
-    "Honda": ["honda"],
-    "Renault": ["renault"],
-    "Nissan": ["nissan"],
-    "Skoda": ["skoda"],
-    "Volkswagen": ["volkswagen", "vw"],
-    "BYD": ["byd"],
-    "Volvo": ["volvo"],
-    "Tata Motors": ["tata"]
-}
+ 
+def get_table_engine():
+    """
+    Return the PPStructure engine, loading it on first use.
+    """
+    global table_engine, unreported_load_seconds
+    if table_engine is None:
+        start = time.monotonic()
+ 
+        # from paddleocr import PaddleOCR
+        from paddleocr import PPStructure
+        table_engine = PPStructure(**TABLE_ENGINE_CONFIG, cpu_threads=OCR_THREADS_PER_WORKER)
+ 
+        elapsed = time.monotonic() - start
+        unreported_load_seconds = elapsed
+        print(f"[INFO] PPStructure loaded in {elapsed:.1f}s")
+    return table_engine
+ 
+ 
+# ------------------ CONFIG ------------------
  
 URL_PATTERNS = {
     "Maruti Suzuki": "discounts-and-offers-on-maruti-suzuki-nexa-cars-for-{month}-{year}",
@@ -85,9 +100,9 @@ def get_month_from_title(title):
  
 # ------------------ STEP 1: FETCH MONTH POSTS ------------------
  
-def fetch_all_posts():
+async def fetch_all_posts():
     url = "https://www.autopunditz.com/offers-for-the-month"
-    r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
+    r = await fetch(url, timeout=15, source="blog")
     soup = BeautifulSoup(r.text, "html.parser")
  
     posts = []
@@ -106,28 +121,62 @@ def fetch_all_posts():
     return list(unique.values())
  
  
-def find_latest_post_for_company(posts, company):
+MONTH_YEAR_RE = re.compile(
+    r"(january|february|march|april|may|june|july|august|september|october|november|december)\s+(\d{4})"
+)
+ 
+ 
+def extract_year_month(title):
+    m = MONTH_YEAR_RE.search(title.lower())
+    if m:
+        month = m.group(1).title()
+        year = int(m.group(2))
+        month_num = datetime.strptime(month, "%B").month
+        return year, month_num
+    return 0, 0
+ 
+ 
+def build_post_index(posts):
     """
-    From index page posts, find latest post for company based on title date.
+    company -> its posts, newest first by (year, month) in the title.
     """
-    matched = [p for p in posts if is_company_match(p["title"], company)]
- 
-    def extract_year_month(title):
-        m = re.search(
-            r"(january|february|march|april|may|june|july|august|september|october|november|december)\s+(\d{4})",
-            title.lower()
-        )
-        if m:
-            month = m.group(1).title()
-            year = int(m.group(2))
-            month_num = datetime.strptime(month, "%B").month
-            return year, month_num
-        return 0, 0
+    index = {company: [] for company in COMPANY_NAME_MAP}
+ 
+    for p in posts:
+        key = extract_year_month(p["title"])
+        for company in COMPANY_NAME_MAP:
+            if is_company_match(p["title"], company):
+                index[company].append((key, p))
+ 
+    for company, matched in index.items():
+        # Stable sort, ties keep listing order like the old per-company sort
+        matched.sort(key=lambda x: x[0], reverse=True)
+        index[company] = [p for _, p in matched]
  
+    return index
+ 
+ 
+# Offers listing is fetched and indexed once per run
+_post_index = None
+_post_index_lock = asyncio.Lock()
+ 
+ 
+async def get_post_index():
+    global _post_index
+    async with _post_index_lock:
+        if _post_index is None:
+            _post_index = build_post_index(await fetch_all_posts())
+            metrics.incr("schemes.post_index_fetches")
+    return _post_index
+ 
+ 
+def find_latest_post_for_company(post_index, company):
+    """
+    From the post index, find latest post for company based on title date.
+    """
+    matched = post_index.get(company)
     if not matched:
         return None
- 
-    matched.sort(key=lambda x: extract_year_month(x["title"]), reverse=True)
     return matched[0]
  
  
@@ -211,98 +260,160 @@ def find_latest_post_for_company(posts, company):
 #         except:
 #             pass
  
-def extract_table_from_image_url(image_url):
+def _init_ocr_worker():
+    # Keep each worker to its share of the cores, then warm its engine
+    os.environ.setdefault("OMP_NUM_THREADS", str(OCR_THREADS_PER_WORKER))
+    get_table_engine()
+ 
+ 
+def ocr_pool(workers=OCR_WORKERS):
+    """
+    Process pool for OCR. Workers start on demand, so a run where every
+    image is an OCR cache hit never loads PaddleOCR.
+    """
+    # spawn, not fork: the parent has a running event loop and Playwright
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_ocr_worker
+    )
+ 
+ 
+async def extract_table_from_image_url(image_url, pool):
+    """
+    OCR'd table of the image (empty if it has none), or None if the image
+    could not be downloaded or OCR failed.
+    """
     print(f"   Downloading image: {image_url}")
  
     try:
-        response = requests.get(image_url, timeout=30)
-        image = Image.open(BytesIO(response.content)).convert("RGB")
- 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-            image.save(tmp.name)
-            image_path = tmp.name
- 
-        result = table_engine(image_path)
-        tables = []
- 
-        for res in result:
-            if res["type"] == "table":
-                html = res["res"]["html"]
-                dfs = pd.read_html(html)
-                for df in dfs:
-                    tables.append(df)
- 
-        if not tables:
-            print("   ❌ No table detected by PaddleOCR")
-            return pd.DataFrame()
- 
-        # Combine all detected table fragments
-        final_df = pd.concat(tables, ignore_index=True)
- 
-        # ---------------- 1. CLEANUP UNNAMED & EMPTY ----------------
-        final_df = final_df.dropna(how="all")
-        # Remove columns that are 100% "Unnamed"
-        final_df = final_df.loc[:, ~final_df.columns.astype(str).str.contains("^Unnamed")]
-        final_df.columns = [str(c).strip() for c in final_df.columns]
- 
-        # Identify key columns by index (Model is usually 0, Variant is 1)
-        model_col = final_df.columns[0]
-        variant_col = final_df.columns[1] if len(final_df.columns) > 1 else model_col
- 
-        # ---------------- 2. STRIP HEADERS CAPTURED AS DATA ----------------
-        # This prevents the "Row Shift" you see in your Excel
-        header_keywords = ["MODEL", "VARIANT", "GROUP", "CONSUMER", "EXCHANGE"]
-        final_df = final_df[~final_df[model_col].astype(str).str.upper().isin(header_keywords)]
-       
-        # Normalize strings
-        final_df[model_col] = final_df[model_col].astype(str).str.strip().replace(["", "nan", "None", "None None"], np.nan)
-        if variant_col != model_col:
-            final_df[variant_col] = final_df[variant_col].astype(str).str.strip().replace(["", "nan", "None"], np.nan)
- 
-        # ---------------- 3. CONDITIONAL FORWARD FILL (THE FIX) ----------------
-        # Instead of global .ffill(), we only fill the Model if a Variant exists
-        # in that row. This keeps Ignis variants with Ignis and Baleno with Baleno.
-        for i in range(1, len(final_df)):
-            current_model = final_df.iloc[i][model_col]
-            current_variant = final_df.iloc[i][variant_col]
-           
-            # If Model is empty but Variant has data, it belongs to the previous Model
-            if pd.isna(current_model) and pd.notna(current_variant):
-                final_df.iloc[i, final_df.columns.get_loc(model_col)] = final_df.iloc[i-1][model_col]
- 
-        # ---------------- 4. REMOVE FOOTER GARBAGE ----------------
-        # Clean up disclaimer text that PaddleOCR often puts in the Model column
-        garbage_mask = final_df[model_col].astype(str).str.contains(
-            "either scrap|exchange|t&c|conditions apply|applicable|policy|total max",
-            case=False, na=False
-        )
-        final_df = final_df[~garbage_mask]
- 
-        # Final check: Drop rows where all numerical data is missing
-        # (Keeps the table clean of OCR noise)
-        final_df = final_df.dropna(subset=final_df.columns[2:], how='all')
- 
-        final_df = final_df.reset_index(drop=True)
-        return final_df
+        response = await fetch(image_url, timeout=30, source="image")
+        response.raise_for_status()
+    except Exception as e:
+        print("   ❌ Image download error:", e)
+        return None
+ 
+    key = ocr_cache.cache_key(response.content, TABLE_ENGINE_CONFIG)
+ 
+    cached = ocr_cache.get(key)
+    if cached is not None:
+        print("   ⚡ OCR cache hit")
+        return cached
  
+    loop = asyncio.get_running_loop()
+    try:
+        final_df, load_seconds = await loop.run_in_executor(pool, ocr_table_from_bytes, response.content)
     except Exception as e:
         print("   ❌ PaddleOCR error:", e)
-        return pd.DataFrame()
+        return None
  
-    finally:
-        try:
-            if 'image_path' in locals():
-                os.remove(image_path)
-        except:
-            pass
-# ------------------ STEP 3: MAIN SCRAPER ------------------
-def scrape_schemes(company):
-    posts = fetch_all_posts()
-    all_results = []
- 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+    if load_seconds is not None:
+        metrics.add_timing("ocr.engine_load", load_seconds)
+ 
+    # Only successful OCR runs are cached, errors are retried next run
+    ocr_cache.put(key, final_df)
+    return final_df
+ 
+ 
+def ocr_table_from_bytes(content):
+    """
+    (table, engine load seconds) for an image. The load time is only
+    returned with the first result after this process loaded the engine.
+    """
+    global unreported_load_seconds
+ 
+    # Decode once in memory; PPStructure takes a BGR array like cv2.imread
+    image = Image.open(BytesIO(content)).convert("RGB")
+    image_bgr = np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+ 
+    result = get_table_engine()(image_bgr)
+    load_seconds, unreported_load_seconds = unreported_load_seconds, None
+    tables = []
+ 
+    for res in result:
+        if res["type"] == "table":
+            html = res["res"]["html"]
+            dfs = pd.read_html(html)
+            for df in dfs:
+                tables.append(df)
+ 
+    if not tables:
+        print("   ❌ No table detected by PaddleOCR")
+        return pd.DataFrame(), load_seconds
+ 
+    # Combine all detected table fragments
+    return clean_ocr_table(pd.concat(tables, ignore_index=True)), load_seconds
+ 
+ 
+OCR_HEADER_KEYWORDS = ["MODEL", "VARIANT", "GROUP", "CONSUMER", "EXCHANGE"]
+OCR_GARBAGE_PATTERN = "either scrap|exchange|t&c|conditions apply|applicable|policy|total max"
+ 
+ 
+def clean_ocr_table(final_df):
+    """
+    Clean a raw OCR table in one vectorized pass.
+    Same output as the old row-by-row loop (see bench_ocr_cleanup.py).
+    """
+    # ---------------- 1. CLEANUP UNNAMED & EMPTY ----------------
+    final_df = final_df.dropna(how="all")
+    # Remove columns that are 100% "Unnamed"
+    final_df = final_df.loc[:, ~final_df.columns.astype(str).str.contains("^Unnamed")]
+    final_df.columns = [str(c).strip() for c in final_df.columns]
+ 
+    # Identify key columns by index (Model is usually 0, Variant is 1)
+    model_col = final_df.columns[0]
+    variant_col = final_df.columns[1] if len(final_df.columns) > 1 else model_col
+ 
+    # ---------------- 2. STRIP HEADERS CAPTURED AS DATA ----------------
+    # This prevents the "Row Shift" you see in your Excel
+    # The model column is converted to text once and reused below
+    model_text = final_df[model_col].astype(str)
+    is_header = model_text.str.upper().isin(OCR_HEADER_KEYWORDS)
+    final_df = final_df[~is_header].copy()
+ 
+    # Normalize strings
+    models = model_text[~is_header].str.strip().replace(["", "nan", "None", "None None"], np.nan)
+    final_df[model_col] = models
+    if variant_col != model_col:
+        final_df[variant_col] = final_df[variant_col].astype(str).str.strip().replace(["", "nan", "None"], np.nan)
+ 
+    # ---------------- 3. CONDITIONAL FORWARD FILL (THE FIX) ----------------
+    # Instead of global .ffill(), we only fill the Model if a Variant exists
+    # in that row. This keeps Ignis variants with Ignis and Baleno with Baleno.
+    # A filled row takes the Model of the nearest row above it that was not
+    # filled itself (src), which is what the old cascading loop produced.
+    fill = (models.isna() & final_df[variant_col].notna()).to_numpy(copy=True)
+    if len(fill):
+        fill[0] = False
+    src = np.maximum.accumulate(np.where(fill, 0, np.arange(len(fill))))
+    final_df[model_col] = models.to_numpy()[src]
+ 
+    # ---------------- 4. REMOVE FOOTER GARBAGE ----------------
+    # Clean up disclaimer text that PaddleOCR often puts in the Model column
+    # Matched on the pre-fill strings and carried through the same fill
+    garbage_mask = models.str.contains(OCR_GARBAGE_PATTERN, case=False, na=False).to_numpy()[src]
+    final_df = final_df[~garbage_mask]
+ 
+    # Final check: Drop rows where all numerical data is missing
+    # (Keeps the table clean of OCR noise)
+    final_df = final_df.dropna(subset=final_df.columns[2:], how='all')
+ 
+    final_df = final_df.reset_index(drop=True)
+    return final_df
+ 
+ 
+# ------------------ STEP 3: FIND SCHEME IMAGES ------------------
+async def find_scheme_images(company, session):
+    """
+    Browser phase: pick the company's post and collect its table images.
+    Returns {"company", "month", "post_url", "image_urls"}.
+    """
+    post_index = await get_post_index()
+    scheme_post = {"company": company, "month": None, "post_url": None, "image_urls": []}
+ 
+    context = await session.new_context(policy_for("schemes"))
+    try:
+        page = await context.new_page()
  
         print(f"\nProcessing company: {company}")
  
@@ -316,36 +427,37 @@ def scrape_schemes(company):
  
         print(f"   Trying current month URL: {post_url}")
  
-        page.goto(post_url, timeout=60000)
-        page.wait_for_timeout(3000)
+        # Post loads share config.HOST_CONCURRENCY["www.autopunditz.com"]
+        async with host_limit(post_url):
+            await page.goto(post_url, timeout=60000)
+            await wait_for_stable_count(page, "schemes.post", "wow-image img", ceiling_ms=3000, min_count=1)
  
-        images = page.query_selector_all("wow-image img")
+        images = await page.query_selector_all("wow-image img")
  
         # 2️⃣ If no images → fallback to latest available post
         if not images:
             print(f"   ⚠️ No data for current month. Falling back to latest available post...")
  
-            latest_post = find_latest_post_for_company(posts, company)
+            latest_post = find_latest_post_for_company(post_index, company)
  
             if not latest_post:
                 print(f"   ❌ No posts found at all for {company}. Skipping.")
-                browser.close()
-                return pd.DataFrame()
+                return scheme_post
  
             post_url = latest_post["link"]
             month = get_month_from_title(latest_post["title"])
  
             print(f"   Using fallback post: {post_url}")
  
-            page.goto(post_url, timeout=60000)
-            page.wait_for_timeout(3000)
+            async with host_limit(post_url):
+                await page.goto(post_url, timeout=60000)
+                await wait_for_stable_count(page, "schemes.fallback_post", "wow-image img", ceiling_ms=3000, min_count=1)
  
-            images = page.query_selector_all("wow-image img")
+            images = await page.query_selector_all("wow-image img")
  
             if not images:
                 print(f"   ❌ Even fallback post has no images. Skipping {company}.")
-                browser.close()
-                return pd.DataFrame()
+                return scheme_post
  
         print(f"   Using post: {post_url}")
  
@@ -353,8 +465,8 @@ def scrape_schemes(company):
         image_urls = []
  
         for el in images:
-            src = el.get_attribute("src")
-            style = el.get_attribute("style")
+            src = await el.get_attribute("src")
+            style = await el.get_attribute("style")
  
             if src and "wixstatic" in src.lower():
                 src_lower = src.lower()
@@ -384,33 +496,69 @@ def scrape_schemes(company):
  
         print(f"   Found {len(image_urls)} usable image(s)")
  
-        # ------------------ OCR TABLE EXTRACTION ------------------
-        for src in image_urls:
-            print(f"   Downloading image: {src}")
-            try:
-                df_img = extract_table_from_image_url(src)
- 
-                if df_img.empty:
-                    print("   OCR table empty, skipping.")
-                    continue
- 
-                df_img.insert(0, "Company", company)
-                df_img.insert(1, "Source", "AutoPunditz (Image)")
-                df_img.insert(2, "Month", month)
-                df_img["Link"] = post_url
+        scheme_post.update(month=month, post_url=post_url, image_urls=image_urls)
  
-                all_results.append(df_img)
-                print("   ✔ Table extracted successfully")
- 
-            except Exception as e:
-                print("   ❌ Error extracting image table:", e)
+    finally:
+        await context.close()
  
-        browser.close()
+    return scheme_post
  
-    if all_results:
-        final_df = pd.concat(all_results, ignore_index=True)
-        return final_df
-    else:
-        return pd.DataFrame()
  
- 
\ No newline at end of file
+# ------------------ STEP 4: OCR ALL COMPANIES ------------------
+async def extract_scheme_tables(scheme_posts, workers=OCR_WORKERS):
+    """
+    OCR the images of every company's post on one process pool.
+    Returns {company: DataFrame}. Companies with an image that could not be
+    downloaded or OCR'd are left out, so the caller can retry them.
+    """
+    # Same image can be linked from more than one post
+    image_urls = list(dict.fromkeys(
+        src for post in scheme_posts for src in post["image_urls"]
+    ))
+ 
+    with ocr_pool(workers) as pool:
+        tables = await asyncio.gather(*(
+            extract_table_from_image_url(src, pool) for src in image_urls
+        ))
+    tables = dict(zip(image_urls, tables))
+ 
+    results = {}
+    for post in scheme_posts:
+        company = post["company"]
+        all_results = []
+ 
+        if any(tables[src] is None for src in post["image_urls"]):
+            print(f"   [{company}] ❌ Image download or OCR failed, no result.")
+            continue
+ 
+        for src in post["image_urls"]:
+            df_img = tables[src]
+ 
+            if df_img.empty:
+                print(f"   [{company}] OCR table empty, skipping.")
+                continue
+ 
+            df_img = df_img.copy()
+            df_img.insert(0, "Company", company)
+            df_img.insert(1, "Source", "AutoPunditz (Image)")
+            df_img.insert(2, "Month", post["month"])
+            df_img["Link"] = post["post_url"]
+ 
+            all_results.append(df_img)
+            print(f"   [{company}] ✔ Table extracted successfully")
+ 
+        if all_results:
+            results[company] = pd.concat(all_results, ignore_index=True)
+        else:
+            results[company] = pd.DataFrame()
+ 
+    return results
+ 
+ 
+# ------------------ MAIN SCRAPER ------------------
+async def scrape_schemes(company, session):
+    scheme_post = await find_scheme_images(company, session)
+    results = await extract_scheme_tables([scheme_post])
+    if company not in results:
+        raise RuntimeError(f"Scheme image download or OCR failed for {company}")
+    return results[company]
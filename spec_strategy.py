@@ -0,0 +1,102 @@
+# spec_strategy.py
+# Which spec URL pattern works for each brand / URL shape, learned from
+# successful fetches and kept across runs, so models try the right one
+# first instead of sitting through the other pattern's timeouts.
+
+import os
+import json
+from pathlib import Path
+from urllib.parse import urlparse
+
+import metrics
+from config import SPEC_STRATEGY_FILE
+
+# model_url + "/specs", then model_url + "-specifications.htm"
+STRATEGIES = ["specs", "specifications"]
+
+STRATEGY_FILE = Path(SPEC_STRATEGY_FILE)
+
+# key -> {"strategy": str, "failed_seconds": {strategy: avg seconds of a failed attempt}}
+_state = None
+
+
+def _load():
+    global _state
+    if _state is None:
+        try:
+            _state = json.loads(STRATEGY_FILE.read_text())
+        except (OSError, ValueError):
+            _state = {}
+    return _state
+
+
+def url_key(model_url):
+    """
+    "brand/shape" for a model URL as it comes off the brand page, before
+    normalize_model_url: shape is carmodels, htm or path.
+    """
+    if "/carmodels/" in model_url:
+        return f"{model_url.split('/')[-2].lower()}/carmodels"
+
+    path = urlparse(model_url).path.strip("/")
+    brand = path.split("/")[0].lower() if path else ""
+    shape = "htm" if path.endswith(".htm") else "path"
+    return f"{brand}/{shape}"
+
+
+def ordered(key):
+    """
+    Strategies to try for key, the one known to work first.
+    """
+    learned = _load().get(key, {}).get("strategy")
+    if learned not in STRATEGIES:
+        return list(STRATEGIES)
+    return [learned] + [s for s in STRATEGIES if s != learned]
+
+
+def _entry(key):
+    return _load().setdefault(key, {"strategy": None, "failed_seconds": {}})
+
+
+def learn(key, strategy):
+    _entry(key)["strategy"] = strategy
+
+
+def record_success(key, strategy, first_try):
+    """
+    Browser attempt worked: learn it, and count the failed attempt the
+    default order would have paid for.
+    """
+    entry = _entry(key)
+    entry["strategy"] = strategy
+
+    if first_try and strategy != STRATEGIES[0]:
+        # The default order would have failed on STRATEGIES[0] first
+        metrics.incr("spec_urls.attempts_avoided")
+        avoided = entry["failed_seconds"].get(STRATEGIES[0])
+        if avoided is not None:
+            metrics.add_timing("spec_urls.timeout_avoided", avoided)
+
+
+def record_failure(key, strategy, seconds):
+    """
+    Remember what a failed attempt costs (moving average).
+    """
+    entry = _entry(key)
+    previous = entry["failed_seconds"].get(strategy)
+    entry["failed_seconds"][strategy] = seconds if previous is None else (previous + seconds) / 2
+    metrics.incr("spec_urls.failed_attempts")
+
+
+def save():
+    if _state is None:
+        return
+
+    STRATEGY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STRATEGY_FILE.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        tmp.write_text(json.dumps(_state, indent=2, sort_keys=True))
+        os.replace(tmp, STRATEGY_FILE)
+    except OSError as e:
+        print(f"[WARN] Spec URL strategies not saved: {e}")
+        tmp.unlink(missing_ok=True)
@@ -1,15 +1,168 @@
 # utils.py
 
 import re
-import requests
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+import httpx
 from bs4 import BeautifulSoup
 
+import metrics
+import http_cache
+from config import (
+    HOST_CONCURRENCY,
+    DEFAULT_HOST_CONCURRENCY,
+    HOST_RATE_LIMITS,
+    DEFAULT_HOST_RATE_LIMIT,
+)
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 }
 
-def get_soup(url, timeout=30):
-    resp = requests.get(url, headers=HEADERS, timeout=timeout)
+# httpx's own default
+MAX_REDIRECTS = 20
+
+# One pooled client for every HTTP fetch in the run
+_client = None
+
+# host -> asyncio.Semaphore
+_host_limits = {}
+
+# host -> TokenBucket
+_host_buckets = {}
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@asynccontextmanager
+async def host_limit(url):
+    """
+    Hold one of the host's concurrency slots (config.HOST_CONCURRENCY).
+    """
+    host = urlparse(url or "").netloc
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(
+            HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY)
+        )
+
+    async with _host_limits[host]:
+        yield
+
+
+async def wait_for_token(url):
+    """
+    Wait for the host's token bucket (config.HOST_RATE_LIMITS).
+    """
+    host = urlparse(url or "").netloc
+    if host not in _host_buckets:
+        rate, burst = HOST_RATE_LIMITS.get(host, DEFAULT_HOST_RATE_LIMIT)
+        _host_buckets[host] = TokenBucket(rate, burst)
+
+    start = time.monotonic()
+    await _host_buckets[host].acquire()
+    metrics.add_timing("rate_limit.wait", time.monotonic() - start)
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(headers=HEADERS, follow_redirects=True)
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+    # Once per run, not after every write
+    await asyncio.to_thread(http_cache.evict)
+
+
+async def _get(url, timeout, headers, rate_limited):
+    """
+    GET that follows redirects itself, so every hop is held to its own
+    host's limits: a news.google.com redirect and the article it points
+    to are limited separately.
+    """
+    client = get_client()
+    request = client.build_request("GET", url, headers=headers, timeout=timeout)
+    history = []
+
+    while True:
+        hop = str(request.url)
+        if rate_limited:
+            await wait_for_token(hop)
+        async with host_limit(hop):
+            resp = await client.send(request, follow_redirects=False)
+
+        if resp.next_request is None:
+            resp.history = history
+            return resp
+
+        history.append(resp)
+        if len(history) > MAX_REDIRECTS:
+            raise httpx.TooManyRedirects("Exceeded maximum allowed redirects.", request=request)
+        request = resp.next_request
+
+
+async def fetch(url, timeout=30, source="page", rate_limited=False):
+    """
+    GET through the HTTP cache. source picks the TTL (config.HTTP_CACHE_TTLS);
+    stale entries are revalidated with a conditional GET. With rate_limited,
+    every request that goes to the network first waits for its host's token
+    bucket (config.HOST_RATE_LIMITS).
+
+    Cache file reads, writes and (de)compression run in a worker thread,
+    off the event loop the pages share.
+    """
+    entry = await asyncio.to_thread(http_cache.load, url)
+    if entry is not None and entry.age() < http_cache.ttl_for(source):
+        await asyncio.to_thread(http_cache.hit, url, entry)
+        return entry.response()
+
+    headers = entry.conditional_headers() if entry is not None else {}
+
+    resp = await _get(url, timeout, headers, rate_limited)
+
+    if entry is not None and resp.status_code == 304:
+        metrics.incr("http_cache.revalidated")
+        await asyncio.to_thread(http_cache.refresh, url, entry)
+        await asyncio.to_thread(http_cache.hit, url, entry)
+        return entry.response()
+
+    metrics.incr("http_cache.misses")
+    metrics.incr("http_cache.bytes_downloaded", len(resp.content))
+    await asyncio.to_thread(http_cache.put, url, resp)
+    return resp
+
+
+async def get_soup(url, timeout=30, source="page"):
+    resp = await fetch(url, timeout=timeout, source=source)
     resp.raise_for_status()
     return BeautifulSoup(resp.text, "lxml")
 
@@ -0,0 +1,85 @@
+# waits.py
+# Readiness-driven waits for Playwright pages.
+# Each wait returns as soon as its condition holds; the old fixed sleep
+# is only used as the ceiling. Actual and saved time go to metrics.
+
+import time
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+import metrics
+
+POLL_MS = 250
+
+
+def _record(name, start, ceiling_ms):
+    elapsed = time.monotonic() - start
+    metrics.add_timing(f"wait.{name}", elapsed)
+    metrics.add_timing(f"wait_saved.{name}", max(ceiling_ms / 1000 - elapsed, 0))
+    return elapsed
+
+
+async def wait_for_selector(page, name, selector, ceiling_ms):
+    """
+    Wait until selector is attached. Returns True if it showed up.
+    """
+    start = time.monotonic()
+    try:
+        await page.wait_for_selector(selector, state="attached", timeout=ceiling_ms)
+        ready = True
+    except PlaywrightTimeoutError:
+        ready = False
+
+    _record(name, start, ceiling_ms)
+    return ready
+
+
+async def wait_for_stable_count(page, name, selector, ceiling_ms, min_count=0, stable_polls=2):
+    """
+    Wait until the number of elements matching selector is at least
+    min_count and has not changed for stable_polls polls.
+    Returns the last count seen.
+    """
+    start = time.monotonic()
+    deadline = start + ceiling_ms / 1000
+
+    last = await page.locator(selector).count()
+    unchanged = 0
+
+    while time.monotonic() < deadline:
+        await page.wait_for_timeout(POLL_MS)
+        count = await page.locator(selector).count()
+
+        if count == last:
+            unchanged += 1
+        else:
+            unchanged = 0
+            last = count
+
+        if last >= min_count and unchanged >= stable_polls:
+            break
+
+    _record(name, start, ceiling_ms)
+    return last
+
+
+async def scroll_until_stable(page, name, selector, max_rounds, max_seconds, round_ceiling_ms):
+    """
+    Infinite-scroll driver: scroll to the bottom, wait for more elements
+    matching selector, repeat until a round adds none or the round / time
+    cap is hit. Returns (count, rounds).
+    """
+    start = time.monotonic()
+    count = await page.locator(selector).count()
+    rounds = 0
+
+    while rounds < max_rounds and time.monotonic() - start < max_seconds:
+        rounds += 1
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        grown = await wait_for_stable_count(page, name, selector, round_ceiling_ms, min_count=count + 1)
+
+        if grown <= count:
+            break
+        count = grown
+
+    metrics.add_timing(f"scroll.{name}", time.monotonic() - start)
+    return count, rounds
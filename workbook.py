@@ -0,0 +1,204 @@
+# workbook.py
+# Final workbook export on openpyxl's write-only (streaming) mode: rows go
+# straight to the file instead of building the whole workbook in memory.
+# Same stacked sections per company sheet and the same "Segment
+# Comparison" sheet as the old DataFrame.to_excel(startrow=...) writer.
+
+import time
+import tracemalloc
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+import metrics
+from config import WORKBOOK_TRACE_MEMORY
+
+# pandas' to_excel header style
+_THIN = Side(style="thin")
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+
+def _value(value):
+    # NaN/None/NaT become empty cells, numpy scalars plain Python values
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+class StreamSheet:
+    """
+    Write-only sheet that accepts DataFrames at a start row, like
+    to_excel(startrow=...). Rows can only move forward.
+    """
+
+    def __init__(self, book, title):
+        self.book = book
+        self.title = title
+        self.ws = None
+        self.row = 0
+
+    def _skip_to(self, start_row):
+        if self.ws is None:
+            self.ws = self.book.create_sheet(self.title)
+        while self.row < start_row:
+            self.ws.append([])
+            self.row += 1
+
+    def _header(self, columns):
+        cells = []
+        for name in columns:
+            cell = WriteOnlyCell(self.ws, value=_value(name))
+            cell.font = HEADER_FONT
+            cell.border = HEADER_BORDER
+            cell.alignment = HEADER_ALIGNMENT
+            cells.append(cell)
+        return cells
+
+    def write(self, df, start_row, header=True):
+        self._skip_to(start_row)
+
+        if header:
+            self.ws.append(self._header(df.columns))
+            self.row += 1
+
+        for values in df.itertuples(index=False, name=None):
+            self.ws.append([_value(v) for v in values])
+            self.row += 1
+
+
+def write_workbook(output_file, market_df, results):
+    book = Workbook(write_only=True)
+    all_models = []
+
+    for company in results:
+        start_row = 0
+        pricing_data = results[company]["pricing"]
+        sheet = StreamSheet(book, company[:31])
+
+        # -----------------------------
+        # Market Position + Pricing
+        # -----------------------------
+        mp_df = market_df[market_df["Company"] == company]
+
+        if not mp_df.empty:
+            combined = mp_df.reset_index(drop=True)
+            sheet.write(combined, start_row)
+            start_row += len(combined) + 3
+
+        # -----------------------------
+        # Discounts
+        # -----------------------------
+        discounts_df = results[company]["discounts"]
+        if not discounts_df.empty:
+            sheet.write(discounts_df, start_row)
+            start_row += len(discounts_df) + 3
+
+        # -----------------------------
+        # Schemes
+        # -----------------------------
+        schemes_df = results[company]["schemes"]
+        if not schemes_df.empty:
+            sheet.write(schemes_df, start_row)
+            start_row += len(schemes_df) + 3
+
+        # -----------------------------
+        # Pricing (Structured)
+        # -----------------------------
+        if pricing_data:
+            # Company-level summary
+            summary_df = pd.DataFrame([pricing_data["company_summary"]])
+            sheet.write(summary_df, start_row)
+            start_row += len(summary_df) + 2
+
+            # Model-level pricing
+            models_df = pd.DataFrame(pricing_data["models"])
+            sheet.write(models_df, start_row)
+            start_row += len(models_df) + 4
+
+            for model in pricing_data["models"]:
+                all_models.append({
+                    "Company": company,
+                    "Segment": model.get("Body Type", "Unknown"),
+                    "Model Name": model.get("Model Name"),
+                    "Price": model.get("Price")
+                })
+
+    # -----------------------------
+    # Segment-wise Comparison Sheet
+    # -----------------------------
+    if all_models:
+        df_all = pd.DataFrame(all_models)
+        segments = sorted(df_all["Segment"].dropna().unique())  # sort segments alphabetically
+        sheet = StreamSheet(book, "Segment Comparison")
+        start_row = 0
+
+        for segment in segments:
+            title_df = pd.DataFrame(
+                [[f"Segment: {segment}", None, None]],
+                columns=["Company", "Model Name", "Price"]
+            )
+            sheet.write(title_df, start_row, header=False)
+            start_row += 1
+
+            # Segment data
+            segment_df = (
+                df_all[df_all["Segment"] == segment]
+                [["Company", "Model Name", "Price"]]
+                .reset_index(drop=True)
+            )
+            sheet.write(segment_df, start_row)
+
+            # Leave space after each segment
+            start_row += len(segment_df) + 3
+
+    book.save(output_file)
+
+
+def write_sheets(output_file, frames):
+    """
+    One DataFrame per sheet ({sheet name: df}), header at the top, in a
+    single pass. Returns False (and writes nothing) if frames is empty.
+    """
+    if not frames:
+        return False
+
+    book = Workbook(write_only=True)
+    for sheet_name, df in frames.items():
+        StreamSheet(book, sheet_name[:31]).write(df, 0)
+
+    book.save(output_file)
+    return True
+
+
+def export(output_file, market_df, results, trace_memory=WORKBOOK_TRACE_MEMORY):
+    """
+    write_workbook with its time in the run stats, and its peak Python
+    memory when trace_memory is on (tracemalloc slows the export down a lot).
+    """
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.monotonic()
+    try:
+        write_workbook(output_file, market_df, results)
+    finally:
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    elapsed = time.monotonic() - start
+    metrics.add_timing("export.workbook", elapsed)
+
+    if trace_memory:
+        metrics.incr("export.peak_kb", peak // 1024)
+        print(f"[INFO] Workbook written in {elapsed:.2f}s, peak {peak / 1024 / 1024:.1f} MB")
+    else:
+        print(f"[INFO] Workbook written in {elapsed:.2f}s")